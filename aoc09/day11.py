@@ -1,4 +1,4 @@
-from aoc09 import util
+from aoc09.tools.incode_loader import load_program
 from aoc09.tools.incode_computer import IntcodeComputer
 from aoc09.tools.robot import EmergencyHullPaintingRobot
 
@@ -67,7 +67,7 @@ from aoc09.tools.robot import EmergencyHullPaintingRobot
 #
 # Build a new emergency hull painting robot and run the Intcode program on it. How many panels does it paint at least once?
 
-input_1 = list(map(int, util.read_input("day11", ",")))
+input_1 = load_program("day11")
 
 comp = IntcodeComputer(input_1)
 robot = EmergencyHullPaintingRobot(comp)
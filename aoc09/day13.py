@@ -1,8 +1,8 @@
-import arcade
+import sys
 
-from aoc09.game.day13 import Game13, GameComputer
 from aoc09.tools.incode_computer import IntcodeComputer
-from aoc09.util import read_input
+from aoc09.tools.incode_loader import load_program
+from aoc09.tools.incode_replay import InputRecorder, replay
 
 # --- Day 13: Care Package ---
 #
@@ -23,7 +23,7 @@ from aoc09.util import read_input
 # Start the game. How many block tiles are on the screen when the game exits?
 
 
-the_input = list(map(int, read_input("day13", ",")))
+the_input = load_program("day13")
 
 comp = IntcodeComputer(the_input)
 comp.run()
@@ -46,11 +46,23 @@ print("Part one:", block_count)
 # Beat the game by breaking all the blocks. What is your score after the last block is broken?
 
 
+# A game is recorded to day13.replay; run with the path of a recording to replay it headless instead.
+
 the_input[0] = 2  # to play for free
-int_comp = IntcodeComputer(the_input)
-# outputs initial screen state and waits for input
-max_x = max(comp.output_list[::3])
-max_y = max(comp.output_list[1::3])
-game = Game13(max_x, max_y, int_comp)
-game.setup()
-arcade.run()
+if len(sys.argv) > 1:
+    int_comp = replay(the_input, InputRecorder.load(sys.argv[1]), verify=True)
+    print("Score:", [score for x, _, score in zip(*[iter(int_comp.output_list)] * 3) if x == -1][-1])
+    print("Instructions:", int_comp.recorder.instructions)
+else:
+    import arcade
+    from aoc09.game.day13 import Game13
+
+    int_comp = IntcodeComputer(the_input)
+    int_comp.recorder = InputRecorder()
+    # outputs initial screen state and waits for input
+    max_x = max(comp.output_list[::3])
+    max_y = max(comp.output_list[1::3])
+    game = Game13(max_x, max_y, int_comp)
+    game.setup()
+    arcade.run()
+    int_comp.recorder.save("day13.replay")
@@ -1,4 +1,4 @@
-from aoc09.util import read_input
+from aoc09.tools.incode_loader import load_program
 from aoc09.tools.incode_computer import IntcodeComputer
 from aoc09.tools.map import Map, Location
 
@@ -101,6 +101,69 @@ def bfs(droid, explore_mode=False):
     return step_count
 
 
+# the copy based exploration above forks the droid for every branch, the one below walks a single droid
+explore_with_copies = False
+
+directions = {N: (0, 1), S: (0, -1), W: (-1, 0), E: (1, 0)}
+reverse = {N: S, S: N, W: E, E: W}
+
+
+def explore_by_backtracking(computer):
+    """
+    Maps the whole area with a single droid walking depth first, going back with the reverse move once every
+    neighbour of its location is known.
+    :return: the map and the location of the oxygen system
+    """
+    explored_map = Map()
+    explored_map.set(0, 0, empty)
+    oxygen_system = None
+    x, y = 0, 0
+    path = []  # moves from the start to the current location
+    while True:
+        for direction, (dx, dy) in directions.items():
+            if explored_map.get(x + dx, y + dy, unexplored) != unexplored:
+                continue
+
+            computer.continue_run([direction])
+            result = computer.take_output()[-1]
+            if result == hit_wall:
+                explored_map.set(x + dx, y + dy, wall)
+            else:
+                x, y = x + dx, y + dy
+                explored_map.set(x, y, target if result == moved_to_target else empty)
+                if result == moved_to_target:
+                    oxygen_system = (x, y)
+                path.append(direction)
+            break
+        else:
+            if not path:
+                return explored_map, oxygen_system
+            back = reverse[path.pop()]
+            computer.continue_run([back])
+            computer.take_output()
+            dx, dy = directions[back]
+            x, y = x + dx, y + dy
+
+
+def distances_from(explored_map, start):
+    """
+    Flood fills the open locations of the map from start.
+    :return: the number of moves from start to every reachable location
+    """
+    distances = {start: 0}
+    front = [start]
+    while front:
+        next_front = []
+        for x, y in front:
+            for dx, dy in directions.values():
+                neighbour = (x + dx, y + dy)
+                if neighbour not in distances and explored_map.get(x + dx, y + dy, wall) != wall:
+                    distances[neighbour] = distances[(x, y)] + 1
+                    next_front.append(neighbour)
+        front = next_front
+    return distances
+
+
 # --- Day 15: Oxygen System ---
 #
 # Out here in deep space, many things can go wrong. Fortunately, many of those things have indicator lights. Unfortunately, one of those lights is lit: the oxygen system for part of the ship has failed!
@@ -178,13 +241,17 @@ def bfs(droid, explore_mode=False):
 #
 # What is the fewest number of movement commands required to move the repair droid from its starting position to the location of the oxygen system?
 
-program = list(map(int, read_input("day15", ",")))
-droid_computer = IntcodeComputer(program)
-area_map = Map()
-droid_location = Location(0, 0)
-area_map.set(0, 0, empty)
+program = load_program("day15")
+if explore_with_copies:
+    droid_computer = IntcodeComputer(program)
+    area_map = Map()
+    droid_location = Location(0, 0)
+    area_map.set(0, 0, empty)
 
-droid_on_target = bfs(Droid(droid_computer, droid_location))
+    droid_on_target = bfs(Droid(droid_computer, droid_location))
+else:
+    area_map, oxygen_location = explore_by_backtracking(IntcodeComputer(program))
+    print("Part One", distances_from(area_map, (0, 0))[oxygen_location])
 
 
 # --- Part Two ---
@@ -238,6 +305,9 @@ droid_on_target = bfs(Droid(droid_computer, droid_location))
 # Use the repair droid to get a complete map of the area. How many minutes will it take to fill with oxygen?
 
 
-area_map = Map()  # clean up map
-steps = bfs(droid_on_target, explore_mode=True)
-print("Part Two", steps - 1)  # last round nothing expands
+if explore_with_copies:
+    area_map = Map()  # clean up map
+    steps = bfs(droid_on_target, explore_mode=True)
+    print("Part Two", steps - 1)  # last round nothing expands
+else:
+    print("Part Two", max(distances_from(area_map, oxygen_location).values()))
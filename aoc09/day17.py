@@ -1,5 +1,5 @@
-from aoc09.util import read_input
-from aoc09.tools.incode_computer import IntcodeComputer
+from aoc09.tools.incode_loader import load_program
+from aoc09.tools.incode_computer import IntcodeComputer, AsciiInput, AsciiOutput
 from aoc09.tools.matrix import Matrix
 
 # --- Day 17: Set and Forget ---
@@ -50,10 +50,11 @@ from aoc09.tools.matrix import Matrix
 
 SCAFFOLDING = "#"
 
-program = list(map(int, read_input("day17", ",")))
+program = load_program("day17")
 computer = IntcodeComputer(program)
+computer.output_list = AsciiOutput()
 computer.run()
-output = ''.join(list(map(chr, computer.output_list)))
+output = str(computer.output_list)
 elements = list(map(list, output.split("\n")))
 matrix = Matrix()
 matrix.init_from_values(elements)
@@ -222,11 +223,12 @@ routine_a = ','.join(dictionary[0]) + '\n'
 routine_b = ','.join(dictionary[1]) + '\n'
 routine_c = ','.join(dictionary[2]) + '\n'
 
-routines_input = list(map(ord, main_routine + routine_a + routine_b + routine_c + 'n' + '\n'))
+routines_input = AsciiInput(main_routine + routine_a + routine_b + routine_c + 'n' + '\n')
 
-program = list(map(int, read_input("day17", ",")))
+program = load_program("day17")
 program[0] = 2
 computer = IntcodeComputer(program)
+computer.output_list = AsciiOutput()
 result = computer.run(routines_input)
-print("Part Two:", computer.output_list[-1])
+print("Part Two:", computer.output_list.values[-1][1])
 
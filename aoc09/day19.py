@@ -1,5 +1,5 @@
-from aoc09.tools.incode_computer import IntcodeComputer
-from aoc09.util import read_input
+from aoc09.tools.incode_batch import BatchRunner, run_many
+from aoc09.tools.incode_loader import load_program
 from aoc09.tools.matrix import Matrix
 
 # --- Day 19: Tractor Beam ---
@@ -32,18 +32,12 @@ from aoc09.tools.matrix import Matrix
 # However, you'll need to scan a larger area to understand the shape of the beam. How many points are affected by the tractor beam in the 50x50 area closest to the emitter? (For each of X and Y, this will be 0 through 49.)
 
 
-def run_program(mem, x, y):
-    comp = IntcodeComputer(mem)
-    comp.run([x, y])
-    return comp.output_list[-1]
-
-
 if __name__ == '__main__':
-    the_input = list(map(int, read_input("day19", ",")))
+    the_input = load_program("day19")
 
     m = Matrix().init_from_elem(50, 20, ".")
-    for x, y in m.index_range():
-        is_pulled = run_program(the_input, x, y)
+    cells = list(m.index_range())
+    for (x, y), is_pulled in zip(cells, run_many(the_input, cells, workers=None)):
         if is_pulled == 1:
             m.set(x, y, "#")
 
@@ -110,12 +104,12 @@ ON_LINE = 0
 OUT = -1
 
 if __name__ == '__main__':
-    the_input = list(map(int, read_input("day19", ",")))
+    the_input = load_program("day19")
+
+    runner = BatchRunner(the_input)
 
     def run_program(x, y):
-        comp = IntcodeComputer(the_input)
-        comp.run([x, y])
-        return comp.output_list[-1]
+        return runner.run((x, y))
 
     def bottom_line_position(x, y):
         it = run_program(x, y)
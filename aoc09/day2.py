@@ -1,4 +1,4 @@
-from aoc09 import util
+from aoc09.tools.incode_loader import load_program
 
 
 # --- Day 2: 1202 Program Alarm ---
@@ -105,7 +105,7 @@ def execute(memory):
     return memory[0]
 
 
-the_input = list(map(int, util.read_input("day2", ",")))
+the_input = load_program("day2")
 
 part_one_input = the_input.copy()
 # reset input
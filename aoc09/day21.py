@@ -1,5 +1,5 @@
-from aoc09.tools.incode_computer import IntcodeComputer
-from aoc09 import util
+from aoc09.tools.incode_computer import IntcodeComputer, AsciiInput, AsciiOutput
+from aoc09.tools.incode_loader import load_program
 
 # --- Day 21: Springdroid Adventure ---
 #
@@ -89,7 +89,7 @@ from aoc09 import util
 # Program the springdroid with logic that allows it to survey the hull without falling into space. What amount of hull damage does it report?
 
 if __name__ == '__main__':
-    mem = list(map(int, util.read_input("day21", ",")))
+    mem = load_program("day21")
     comp = IntcodeComputer(mem)
 
     program = """NOT A J
@@ -99,11 +99,9 @@ if __name__ == '__main__':
                  WALK
               """
 
-    compiled = list(map(lambda c: ord(c), program))
-
-    comp.run(compiled)
-    result = "".join(list(map(lambda o: chr(o) if o < 127 else str(o), comp.output_list)))
-    print(result)
+    comp.output_list = AsciiOutput()
+    comp.run(AsciiInput(program))
+    print(comp.output_list)
 
 # --- Part Two ---
 #
@@ -123,7 +121,7 @@ if __name__ == '__main__':
 
 
 if __name__ == '__main__':
-    mem = list(map(int, util.read_input("day21", ",")))
+    mem = load_program("day21")
     comp = IntcodeComputer(mem)
 
     program = """NOT A J
@@ -140,8 +138,6 @@ if __name__ == '__main__':
                  RUN
               """
 
-    compiled = list(map(lambda c: ord(c), program))
-
-    comp.run(compiled)
-    result = "".join(list(map(lambda o: chr(o) if o < 127 else str(o), comp.output_list)))
-    print(result)
+    comp.output_list = AsciiOutput()
+    comp.run(AsciiInput(program))
+    print(comp.output_list)
@@ -1,4 +1,4 @@
-from aoc09 import util
+from aoc09.tools.incode_loader import load_program
 from aoc09.tools import incode_computer
 
 # --- Day 5: Sunny with a Chance of Asteroids ---
@@ -53,7 +53,7 @@ from aoc09.tools import incode_computer
 # After providing 1 to the only input instruction and passing all the tests, what diagnostic code does the program produce?
 
 
-the_input = list(map(int, util.read_input("day5", ",")))
+the_input = load_program("day5")
 the_output = []
 
 # Input should be 1
@@ -101,7 +101,7 @@ print("Part One Finished")
 #
 # What is the diagnostic code for system ID 5?
 
-test_input = list(map(int, util.read_input("day5", ",")))
+test_input = load_program("day5")
 # Input should be 5
 the_output = incode_computer.IntcodeComputer(test_input).run([5])
 print("Part Two Finished")
@@ -1,7 +1,5 @@
-import itertools
-
-from aoc09 import util
-from aoc09.tools import incode_computer
+from aoc09.tools.incode_loader import load_program
+from aoc09.tools import amplifier
 
 # --- Day 7: Amplification Circuit ---
 #
@@ -49,23 +47,12 @@ from aoc09.tools import incode_computer
 #
 # Try every combination of phase settings on the amplifiers. What is the highest signal that can be sent to the thrusters?
 
-amps_count = 5
 phase_setting_min = 0
 phase_setting_max = 4
 
-settings_list = itertools.permutations(range(phase_setting_min, phase_setting_max + 1), amps_count)
-
-the_input = list(map(int, util.read_input("day7", ",")))
-
-max_output = 0
-for setting in settings_list:
-    apm_input = 0
-    for phase in setting:
-        computer = incode_computer.IntcodeComputer(the_input)
-        computer.run([phase, apm_input])
-        apm_input = computer.output_list[-1]
+the_input = load_program("day7")
 
-    max_output = max(apm_input, max_output)
+max_output, _ = amplifier.find_max_signal(the_input, range(phase_setting_min, phase_setting_max + 1))
 
 print("Part One:", max_output)
 
@@ -108,24 +95,9 @@ print("Part One:", max_output)
 #
 # Try every combination of the new phase settings on the amplifier feedback loop. What is the highest signal that can be sent to the thrusters?
 
-amps_count = 5
 phase_setting_min = 5
 phase_setting_max = 9
 
-settings_list = itertools.permutations(range(phase_setting_min, phase_setting_max + 1), amps_count)
-
-max_output = 0
-for setting in settings_list:
-    amps = [incode_computer.IntcodeComputer(the_input) for i in range(0, amps_count)]
-    for (phase, amp) in zip(setting, amps):
-        amp.run([phase])
-
-    input = 0
-    while amps[-1].state != incode_computer.IntcodeComputer.State.done:
-        for amp in amps:
-            amp.continue_run([input])
-            input = amp.output_list[-1]
-
-    max_output = max(input, max_output)
+max_output, _ = amplifier.find_max_signal(the_input, range(phase_setting_min, phase_setting_max + 1), feedback=True)
 
 print("Part Two:", max_output)
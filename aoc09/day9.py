@@ -1,4 +1,4 @@
-from aoc09 import util
+from aoc09.tools.incode_loader import load_program
 from aoc09.tools import incode_computer
 
 # --- Day 9: Sensor Boost ---
@@ -40,7 +40,7 @@ from aoc09.tools import incode_computer
 #
 # Once your Intcode computer is fully functional, the BOOST program should report no malfunctioning opcodes when run in test mode; it should only output a single value, the BOOST keycode. What BOOST keycode does it produce?
 
-input_1 = list(map(int, util.read_input("day9", ",")))
+input_1 = load_program("day9")
 
 comp = incode_computer.IntcodeComputer(input_1)
 comp.run([1])
@@ -0,0 +1,60 @@
+import functools
+import itertools
+import os
+
+from aoc09.tools.incode_batch import IntcodePool
+from aoc09.tools.incode_computer import IntcodeComputer
+
+
+class AmplifierChain:
+    """
+    Intcode computers connected in series: each computer gets its phase setting as first input and the output of
+    the previous computer as further input. With feedback the last computer's output goes back to the first one,
+    forming a ring that runs until the last computer halts.
+    """
+
+    def __init__(self, image, phases, feedback=False):
+        """
+        :param image: computer with the loaded program, forked for every amplifier and never run itself
+        """
+        self.image = image
+        self.feedback = feedback
+        self.amps = [image.fork() for _ in phases]
+        for phase, amp in zip(phases, self.amps):
+            amp.run([phase])
+
+    def run(self, signal=0):
+        values = [signal]
+        while True:
+            for amp in self.amps:
+                amp.continue_run(values)
+                values = amp.take_output()
+
+            if not self.feedback or not self.amps[-1].is_running():
+                for amp in self.amps:
+                    self.image.adopt_code(amp)
+                return values[-1]
+
+
+def find_max_signal(program, phase_values, feedback=False, workers=1):
+    """
+    Tries every permutation of the phase values as settings of a chain of amplifiers, one per phase value.
+
+    :param workers: number of processes to spread the settings over, or None for one per CPU
+    :return: the highest signal sent to the thrusters and the setting producing it
+    """
+    settings = itertools.permutations(phase_values)
+    if workers is None:
+        workers = os.cpu_count()
+    if workers <= 1:
+        image = IntcodeComputer(program)
+        return max((AmplifierChain(image, s, feedback).run(), s) for s in settings)
+
+    settings = list(settings)
+    with IntcodePool(workers) as pool:
+        signals = pool.apply(pool.publish(program), functools.partial(_chain_signal, feedback=feedback), settings)
+    return max(zip(signals, settings))
+
+
+def _chain_signal(image, setting, feedback):
+    return AmplifierChain(image, setting, feedback).run()
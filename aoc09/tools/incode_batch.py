@@ -0,0 +1,167 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from aoc09.tools.incode_computer import IntcodeComputer
+
+
+def feed_input(computer, item):
+    computer.input_list.extend(item)
+
+
+def last_output(computer):
+    return computer.output_list[-1] if computer.output_list else None
+
+
+class BatchRunner:
+    """
+    Runs the same program many times, each run starting from a preloaded image of it.
+    Restoring the image only copies back the memory pages the previous run wrote to, and the code decoded by the
+    runs is kept with the image so later runs do not decode it again.
+    """
+
+    def __init__(self, program, prepare=feed_input, result=last_output, compile_blocks=False):
+        """
+        :param prepare: called with the computer and the item of each run before running, by default feeds the item
+            as input
+        :param result: called with the computer after each run, its return value is the result of the run
+        """
+        self.image = IntcodeComputer(program, compile_blocks)
+        self.computer = IntcodeComputer([], compile_blocks)
+        self.prepare = prepare
+        self.result = result
+
+    def run(self, item):
+        self.computer.restore(self.image)
+        self.prepare(self.computer, item)
+        self.computer.run()
+        self.image.adopt_code(self.computer)
+        return self.result(self.computer)
+
+
+def run_many(program, items, workers=1, prepare=feed_input, result=last_output, compile_blocks=False):
+    """
+    Runs the program once for each item and returns the results in the order of the items.
+
+    :param workers: number of processes to spread the runs over, or None for one per CPU. With more than one worker
+        prepare and result must be picklable, i.e. module level functions
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    if workers <= 1:
+        runner = BatchRunner(program, prepare, result, compile_blocks)
+        return [runner.run(item) for item in items]
+
+    with IntcodePool(workers, compile_blocks) as pool:
+        return pool.map(pool.publish(program), items, prepare, result)
+
+
+class IntcodePool:
+    """
+    Persistent pool of worker processes running Intcode programs. A program is published once into shared memory as
+    an array of 64 bit integers, which workers read directly the first time a task refers to it, keeping their own
+    image of it from then on. Tasks only carry the name of the shared program and their items:
+
+        with IntcodePool() as pool:
+            program = pool.publish(memory)
+            results = pool.map(program, items)
+
+    Functions passed to the pool must be picklable, i.e. module level functions or partials of them.
+    """
+
+    def __init__(self, workers=None, compile_blocks=False):
+        self.workers = os.cpu_count() if workers is None else workers
+        self.compile_blocks = compile_blocks
+        self._executor = ProcessPoolExecutor(self.workers)
+        self._programs = {}  # name -> shared memory holding the program length followed by the program
+
+    def publish(self, program):
+        """
+        :return: the name by which tasks refer to the program
+        """
+        shared = shared_memory.SharedMemory(create=True, size=8 * (len(program) + 1))
+        self._programs[shared.name] = shared
+        values = shared.buf.cast("q")
+        try:
+            values[0] = len(program)
+            values[1:len(program) + 1] = array("q", program)
+        except OverflowError:
+            values.release()
+            self.release(shared.name)
+            raise ValueError("Only programs of 64 bit integers can be shared")
+        values.release()
+        return shared.name
+
+    def release(self, name):
+        shared = self._programs.pop(name)
+        shared.close()
+        shared.unlink()
+
+    def map(self, name, items, prepare=feed_input, result=last_output, chunk_size=None):
+        """
+        Like run_many, runs the published program once for each item on a BatchRunner of the worker.
+
+        :return: the results in the order of the items
+        """
+        return self._map_chunks(_run_batch, (name, prepare, result, self.compile_blocks), items, chunk_size)
+
+    def apply(self, name, function, items, chunk_size=None):
+        """
+        Calls the function with an image of the published program and each item. The image is a computer kept by
+        the worker for all its tasks, so the function is expected to fork or restore it rather than run it.
+
+        :return: the return values of the function in the order of the items
+        """
+        return self._map_chunks(_apply, (name, function, self.compile_blocks), items, chunk_size)
+
+    def close(self):
+        self._executor.shutdown()
+        for name in list(self._programs):
+            self.release(name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _map_chunks(self, task, arguments, items, chunk_size):
+        items = list(items)
+        if chunk_size is None:
+            chunk_size = max(1, len(items) // (self.workers * 4))
+        futures = [self._executor.submit(task, *arguments, items[i:i + chunk_size])
+                   for i in range(0, len(items), chunk_size)]
+        return [value for future in futures for value in future.result()]
+
+
+# the programs read from shared memory by a worker process, and the runners and images created from them
+_worker_programs = {}
+_worker_runners = {}
+_worker_images = {}
+
+
+def _worker_program(name):
+    program = _worker_programs.get(name)
+    if program is None:
+        shared = shared_memory.SharedMemory(name=name)
+        values = shared.buf.cast("q")
+        program = _worker_programs[name] = values[1:values[0] + 1].tolist()
+        values.release()
+        shared.close()
+    return program
+
+
+def _run_batch(name, prepare, result, compile_blocks, items):
+    key = (name, prepare, result, compile_blocks)
+    runner = _worker_runners.get(key)
+    if runner is None:
+        runner = _worker_runners[key] = BatchRunner(_worker_program(name), prepare, result, compile_blocks)
+    return [runner.run(item) for item in items]
+
+
+def _apply(name, function, compile_blocks, items):
+    image = _worker_images.get((name, compile_blocks))
+    if image is None:
+        image = _worker_images[(name, compile_blocks)] = IntcodeComputer(_worker_program(name), compile_blocks)
+    return [function(image, item) for item in items]
@@ -0,0 +1,184 @@
+"""
+Performance baseline of the Intcode computer on the puzzle programs of every Intcode day.
+
+For each workload it reports the number of executed instructions, wall time, instructions per second and peak
+memory, and stores the results as JSON so that runs of different engine versions can be compared:
+
+    python -m aoc09.tools.incode_benchmark --output bench.json
+    python -m aoc09.tools.incode_benchmark --baseline bench.json
+"""
+import argparse
+import itertools
+import json
+import time
+import tracemalloc
+
+from aoc09.tools.incode_computer import IntcodeComputer
+from aoc09.tools.incode_loader import load_program
+from aoc09.tools.incode_profiler import IntcodeProfiler
+from aoc09.tools.robot import EmergencyHullPaintingRobot
+
+
+def day2(new_computer, program):
+    program = program.copy()
+    program[1] = 12
+    program[2] = 2
+    new_computer(program).run()
+
+
+def day5(new_computer, program):
+    for system_id in [1, 5]:
+        new_computer(program).run([system_id])
+
+
+def day7(new_computer, program):
+    for setting in itertools.permutations(range(5, 10)):
+        amps = [new_computer(program) for _ in setting]
+        for phase, amp in zip(setting, amps):
+            amp.run([phase])
+        signal = 0
+        while amps[-1].is_running():
+            for amp in amps:
+                amp.continue_run([signal])
+                signal = amp.take_output()[-1]
+
+
+def day9(new_computer, program):
+    for mode in [1, 2]:
+        new_computer(program).run([mode])
+
+
+def day11(new_computer, program):
+    EmergencyHullPaintingRobot(new_computer(program), "#").run()
+
+
+def day13(new_computer, program):
+    # plays the game headless, always moving the paddle towards the ball
+    program = program.copy()
+    program[0] = 2
+    computer = new_computer(program)
+    computer.run()
+    ball = paddle = 0
+    while True:
+        output = computer.take_output()
+        for x, tile in zip(output[::3], output[2::3]):
+            if tile == 3:
+                paddle = x
+            elif tile == 4:
+                ball = x
+        if not computer.is_running():
+            break
+        computer.continue_run([(ball > paddle) - (ball < paddle)])
+
+
+def day15(new_computer, program):
+    # explores the whole area breadth first, forking the droid for every move
+    moves = {1: (0, 1), 2: (0, -1), 3: (-1, 0), 4: (1, 0)}
+    visited = {(0, 0)}
+    front = [((0, 0), new_computer(program))]
+    while front:
+        expanded = []
+        for (x, y), droid in front:
+            for move, (dx, dy) in moves.items():
+                location = (x + dx, y + dy)
+                if location not in visited:
+                    visited.add(location)
+                    moved = droid.fork()
+                    moved.continue_run([move])
+                    if moved.output_list[-1] != 0:
+                        expanded.append((location, moved))
+        front = expanded
+
+
+def day17(new_computer, program):
+    new_computer(program).run()
+
+
+def day19(new_computer, program):
+    for x in range(50):
+        for y in range(50):
+            new_computer(program).run([x, y])
+
+
+def day21(new_computer, program):
+    for script in ["NOT A J\nNOT C T\nAND D T\nOR T J\nWALK\n",
+                   "NOT A J\nNOT B T\nOR T J\nNOT C T\nOR T J\nNOT D T\nNOT T T\nAND T J\nAND H J\nAND E T\nOR T J\n"
+                   "RUN\n"]:
+        new_computer(program).run(list(map(ord, script)))
+
+
+WORKLOADS = [day2, day5, day7, day9, day11, day13, day15, day17, day19, day21]
+
+
+def run_workload(workload, program, compile_blocks=False):
+    """
+    Runs a workload three times: timed, counting its instructions and tracing its peak memory.
+
+    :param workload: function running the program through the computers created by the factory it receives
+    """
+    start = time.perf_counter()
+    workload(lambda memory: IntcodeComputer(memory, compile_blocks), program)
+    seconds = time.perf_counter() - start
+
+    profiler = IntcodeProfiler()
+
+    def new_profiled_computer(memory):
+        computer = IntcodeComputer(memory)
+        computer.profiler = profiler
+        return computer
+
+    workload(new_profiled_computer, program)
+
+    tracemalloc.start()
+    workload(lambda memory: IntcodeComputer(memory, compile_blocks), program)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "workload": workload.__name__,
+        "instructions": profiler.total(),
+        "seconds": seconds,
+        "instructions_per_second": profiler.total() / seconds,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run_all(folder="input/", compile_blocks=False):
+    return [run_workload(w, load_program(w.__name__, folder), compile_blocks)
+            for w in WORKLOADS]
+
+
+def regressions(baseline, results, tolerance=0.1):
+    """
+    :return: the names of the workloads whose instructions per second dropped by more than the tolerance
+    """
+    previous = {r["workload"]: r["instructions_per_second"] for r in baseline}
+    return [r["workload"] for r in results
+            if r["workload"] in previous and r["instructions_per_second"] < previous[r["workload"]] * (1 - tolerance)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--input-folder", default="input/")
+    parser.add_argument("--output", help="file to store the results in as JSON")
+    parser.add_argument("--baseline", help="results of a previous run to check for regressions")
+    parser.add_argument("--compile-blocks", action="store_true")
+    args = parser.parse_args()
+
+    results = run_all(args.input_folder, args.compile_blocks)
+    print(f"{'workload':<10} {'instructions':>12} {'seconds':>9} {'instr/s':>11} {'peak KiB':>9}")
+    for r in results:
+        print(f"{r['workload']:<10} {r['instructions']:>12} {r['seconds']:>9.3f} {r['instructions_per_second']:>11.0f} "
+              f"{r['peak_kib']:>9.0f}")
+
+    if args.output:
+        with open(args.output, "w") as out:
+            json.dump({"compile_blocks": args.compile_blocks, "results": results}, out, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            slower = regressions(json.load(baseline)["results"], results)
+        print("Regressions:", ", ".join(slower) if slower else "none")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import hashlib
+from array import array
+from collections import OrderedDict
+
+from aoc09.tools.incode_computer import IntcodeComputer
+
+
+class PrefixCache:
+    """
+    Memoizes deterministic Intcode runs by the input they consumed. The state of the computer is kept every time it
+    waits for input, keyed by the program and the input consumed so far, so a run whose input starts like an
+    earlier one resumes from the deepest shared wait point instead of executing the program from the start.
+    Least recently used states are evicted once their estimated memory exceeds the budget. The estimate counts the
+    memory pages of every state, 8 bytes per word of compact pages and about 36 (pointer and int object) per word of
+    list pages, but counts pages that states share with each other once per state, so it is an upper bound.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._snapshots = OrderedDict()  # (program key, consumed input) -> (computer, estimated bytes)
+
+    def run(self, program, inputs):
+        """
+        :return: a computer that has consumed the inputs and then halted or waits for more input
+        """
+        program_key = _program_key(program)
+        inputs = tuple(inputs)
+
+        computer = None
+        consumed = len(inputs)
+        while consumed >= 0:
+            cached = self._snapshots.get((program_key, inputs[:consumed]))
+            if cached is not None:
+                self._snapshots.move_to_end((program_key, inputs[:consumed]))
+                computer = cached[0].fork()
+                break
+            consumed -= 1
+
+        if computer is None:
+            self.misses += 1
+            consumed = 0
+            computer = IntcodeComputer(program)
+            computer.run()
+            self._store(program_key, (), computer)
+        else:
+            self.hits += 1
+
+        # feed the rest one value at a time to keep the state at every wait point
+        while consumed < len(inputs) and computer.is_running():
+            computer.continue_run([inputs[consumed]])
+            consumed += 1
+            self._store(program_key, inputs[:consumed], computer)
+
+        return computer
+
+    def statistics(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._snapshots),
+            "bytes": self.used_bytes,
+        }
+
+    def _store(self, program_key, consumed, computer):
+        if not computer.is_running():
+            return
+        key = (program_key, consumed)
+        size = _estimated_bytes(computer.memory)
+        if key in self._snapshots or size > self.max_bytes:
+            return
+
+        self._snapshots[key] = (computer.snapshot(), size)
+        self.used_bytes += size
+        while self.used_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._snapshots.popitem(last=False)
+            self.used_bytes -= evicted_size
+            self.evictions += 1
+
+
+def _program_key(program):
+    # a content digest, as hashes of different programs can be equal
+    try:
+        data = array("q", program).tobytes()
+    except OverflowError:
+        data = ",".join(map(str, program)).encode()
+    return hashlib.sha256(data).digest()
+
+
+def _estimated_bytes(memory):
+    return sum(len(page) * (8 if isinstance(page, array) else 36) for page in memory.pages.values())
@@ -1,169 +1,1099 @@
+import asyncio
+import struct
+import sys
+import time
+from array import array
+from collections import deque
+from itertools import tee
+
+from aoc09.tools.incode_disassembler import IMMEDIATE, Instruction, LENGTHS, POSITION, RELATIVE
+
+
 class IntcodeComputer:
 
-    def __init__(self, memory):
-        self.memory = _Memory(memory)
+    def __init__(self, memory, compile_blocks=False, compact_memory=False):
+        """
+        With compile_blocks the program is translated into one Python function per basic block instead of being
+        interpreted one instruction at a time. Code that the program overwrites is interpreted from then on.
+        With compact_memory memory pages are 64 bit integer arrays, turned into lists only to hold larger values.
+        """
+        self.memory = _new_memory(memory, compact_memory)
         self.pointer = 0
         self.relative_base = 0
         self.state = _State.running
-        self.input_list = []
-        self.output_list = []
+        self.input_list = deque()  # any channel with popleft() that is falsy while no input is available
+        self.output_list = []  # any channel with append()
+        self.compile_blocks = compile_blocks
+        self.profiler = None  # an IntcodeProfiler makes runs count executions and memory accesses
+        self.tracer = None  # an IntcodeTracer makes runs record their last instructions
+        self.recorder = None  # an InputRecorder makes runs log the input they consume
+        self._traced_code = False  # whether the decoded code records the trace
+        self._result = 0  # result of the last traced instruction
 
     def copy(self):
-        other = IntcodeComputer(self.memory.mem.copy())
-        other.pointer = self.pointer
-        other.relative_base = self.relative_base
-        other.state = self.state
-        other.input_list = self.input_list.copy()
-        other.output_list = self.output_list.copy()
+        return self.fork()
+
+    def fork(self):
+        """
+        Returns an independent computer in the same state. Memory pages and decoded code are shared with this
+        computer until either of them changes them, so forking costs what the two later touch rather than the whole
+        memory and code.
+        """
+        other = IntcodeComputer([], self.compile_blocks)
+        other.restore(self)
+        other.profiler = self.profiler
         return other
 
-    def run(self, input_list=None):
+    def snapshot(self):
+        return self.fork()
+
+    def restore(self, snapshot):
+        """
+        Puts this computer back into the state of a snapshot (or any other computer), which stays unaffected.
+        """
+        self.memory = snapshot.memory.fork()
+        self.pointer = snapshot.pointer
+        self.relative_base = snapshot.relative_base
+        self.state = snapshot.state
+        self.input_list = snapshot.input_list.copy()
+        self.output_list = snapshot.output_list.copy()
+        self.compile_blocks = snapshot.compile_blocks
+        self._traced_code = snapshot._traced_code
+
+    def adopt_code(self, other):
+        """
+        Takes over the code another computer has decoded where it matches the memory of this one, so that computers
+        later restored from this one start with that code already decoded.
+        """
+        if other._traced_code != self._traced_code:
+            return
+        other_code = other.memory.code
+        for pointer, entry in other_code.entries.items():
+            length = other_code.spans[pointer]
+            if pointer not in self.memory.code.entries and \
+                    all(self.memory.get(a) == other.memory.get(a) for a in range(pointer, pointer + length)):
+                self.memory.own_code().register(pointer, entry, length)
+
+    def to_bytes(self):
+        """
+        Serializes the state of the computer (memory pages, pointer, relative base, state and pending input and
+        output) into a compact binary checkpoint. Decoded code is not included, it is decoded again after loading.
+        """
+        if not isinstance(self.input_list, (deque, list)) or not isinstance(self.output_list, list):
+            raise ValueError("Only computers with buffered input and output can be serialized")
+
+        parts = [_CHECKPOINT_HEADER.pack(_CHECKPOINT_MAGIC, self.pointer, self.relative_base, self.state.encode(),
+                                         self.memory.size, self.compile_blocks, self.memory.compact,
+                                         len(self.memory.pages))]
+        for index, page in self.memory.pages.items():
+            parts.append(_PAGE_INDEX.pack(index))
+            parts.append(_pack_ints(page))
+        parts.append(_pack_ints(self.input_list))
+        parts.append(_pack_ints(self.output_list))
+        return b"".join(parts)
+
+    @staticmethod
+    def from_bytes(data):
+        view = memoryview(data)
+        magic, pointer, relative_base, state, size, compile_blocks, compact_memory, page_count = \
+            _CHECKPOINT_HEADER.unpack_from(view)
+        if magic != _CHECKPOINT_MAGIC:
+            raise ValueError("Not an Intcode checkpoint")
+
+        offset = _CHECKPOINT_HEADER.size
+        pages = {}
+        for _ in range(page_count):
+            (index,) = _PAGE_INDEX.unpack_from(view, offset)
+            pages[index], offset = _unpack_ints(view, offset + _PAGE_INDEX.size, compact_memory)
+        input_values, offset = _unpack_ints(view, offset)
+        output_values, offset = _unpack_ints(view, offset)
+
+        computer = IntcodeComputer([], compile_blocks)
+        computer.memory = _Memory.from_pages(pages, size, compact_memory)
+        computer.pointer = pointer
+        computer.relative_base = relative_base
+        computer.state = state.decode()
+        computer.input_list = deque(input_values)
+        computer.output_list = output_values
+        return computer
+
+    def save(self, path):
+        with open(path, "wb") as out:
+            out.write(self.to_bytes())
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as checkpoint:
+            return IntcodeComputer.from_bytes(checkpoint.read())
+
+    def __reduce__(self):
+        # pickled as a checkpoint, which is smaller than the objects and leaves out the generated code
+        return IntcodeComputer.from_bytes, (self.to_bytes(),)
+
+    def run(self, input_list=None, max_steps=None, deadline=None, cancel=None):
+        """
+        Runs until the program halts or waits for input, or until one of the optional limits is reached. A limited
+        run that stops early leaves the computer in the budget exhausted state, from which run resumes it.
+
+        :param max_steps: number of instructions to run at most (blocks when compiling)
+        :param deadline: time.monotonic() value after which to stop
+        :param cancel: CancellationToken checked while running, so that another thread can stop the run
+        """
         if input_list:
-            self.input_list = input_list
+            self.input_list = input_list if hasattr(input_list, "popleft") else deque(input_list)
         self.state = _State.running
+        self._check_instruments()
+        self._select_code()
 
-        while self.state == _State.running:
-            self._interpret()
+        if max_steps is not None or deadline is not None or cancel is not None:
+            self._execute_limited(max_steps, deadline, cancel)
+        elif self.profiler is not None:
+            self._execute_profiled()
+        elif self.tracer is not None:
+            self._execute_traced()
+        elif self.recorder is not None:
+            self._execute_recorded()
+        else:
+            self._execute()
 
         return self.memory.get(0)
 
-    def continue_run(self, input_list):
-        return self.run(input_list)
+    def continue_run(self, input_list, max_steps=None, deadline=None, cancel=None):
+        return self.run(input_list, max_steps, deadline, cancel)
 
     def is_running(self):
         return self.state != _State.done
 
-    def _interpret(self):
+    def is_budget_exhausted(self):
+        return self.state == _State.budget_exhausted
+
+    def take_output(self):
+        """
+        Returns the output produced since the last call and clears it.
+        """
+        taken = list(self.output_list)
+        self.output_list.clear()
+        return taken
+
+    def _execute(self):
+        mem = self.memory
+        ptr = self.pointer
+        while ptr is not None:
+            # decoding or overwriting code may replace the decoded code shared with forks by a copy
+            decoded = mem.code.entries
+            while ptr is not None:
+                entry = decoded.get(ptr)
+                if entry is None:
+                    entry = self._decode(ptr)
+                    decoded = mem.code.entries
+                handler, a, b, c = entry
+                ptr = handler(self, mem, ptr, a, b, c)
+            ptr = self._continued_pointer()
+
+    def _execute_steps(self, steps):
+        """
+        Like _execute, but pauses after running the given number of handlers (instructions, or blocks when
+        compiling) and leaves the computer in the running state.
+        """
+        mem = self.memory
+        ptr = self.pointer
+        while ptr is not None:
+            decoded = mem.code.entries
+            while ptr is not None:
+                if steps == 0:
+                    self.pointer = ptr
+                    return
+                steps -= 1
+                entry = decoded.get(ptr)
+                if entry is None:
+                    entry = self._decode(ptr)
+                    decoded = mem.code.entries
+                handler, a, b, c = entry
+                ptr = handler(self, mem, ptr, a, b, c)
+            ptr = self._continued_pointer()
+
+    def _continued_pointer(self):
+        """
+        Handlers return None when the program halts or waits for input, and also after overwriting decoded code,
+        in which case the run goes on at the stored pointer.
+        """
+        return self.pointer if self.state == _State.running else None
+
+    def _run_steps(self, steps):
+        if self.profiler is not None:
+            self._execute_profiled(steps)
+        elif self.tracer is not None:
+            self._execute_traced(steps)
+        elif self.recorder is not None:
+            self._execute_recorded(steps)
+        else:
+            self._execute_steps(steps)
+
+    def _execute_limited(self, max_steps, deadline, cancel):
+        """
+        Runs slices of steps between which the limits are checked, and stops in the budget exhausted state when
+        one of them is reached.
+        """
+        remaining = max_steps
+        while True:
+            if (remaining is not None and remaining <= 0) or (deadline is not None and time.monotonic() >= deadline) \
+                    or (cancel is not None and cancel.is_cancelled()):
+                self.state = _State.budget_exhausted
+                return
+
+            steps = _CHECK_STEPS if remaining is None else min(remaining, _CHECK_STEPS)
+            self._run_steps(steps)
+            if self.state != _State.running:
+                return
+            if remaining is not None:
+                remaining -= steps
+
+    def _execute_profiled(self, steps=-1):
+        """
+        Interprets one instruction at a time, bypassing the decoded code, and reports every instruction and
+        memory access of the program to the profiler. Like _execute_steps it pauses after the given number of
+        instructions, if any.
+        """
+        profiler = self.profiler
+        mem = profiler.watch(self.memory)
+        ptr = self.pointer
+        while ptr is not None:
+            if steps == 0:
+                self.pointer = ptr
+                return
+            steps -= 1
+            full_code = self.memory.get(ptr)
+            handler = _handler(full_code)
+            next_ptr = handler(self, mem, ptr, self.memory.get(ptr + 1), self.memory.get(ptr + 2),
+                               self.memory.get(ptr + 3))
+            if next_ptr is None:
+                if self.state == _State.waiting_for_input:
+                    # the read did not run, it is counted when the run continues
+                    break
+                next_ptr = self._continued_pointer()
+            profiler.count_instruction(ptr, full_code)
+            ptr = next_ptr
+
         if self.state == _State.done:
-            return
+            profiler.halted()
 
-        instruction = IntcodeComputer._decode_instruction(self.memory.get(self.pointer))
-
-        def param_address(i):
-            first_param_address = self.pointer + 1
-            param_i_address = first_param_address + i
-            mode = instruction.param_modes[i]
-            if mode == _Mode.position:
-                address = self.memory.get(param_i_address)
-            elif mode == _Mode.immediate:
-                address = param_i_address
-            elif mode == _Mode.relative:
-                address = self.relative_base + self.memory.get(param_i_address)
-            else:
-                raise Exception("Unknown parameter mode", mode)
-            return address
-
-        def param(i):
-            return self.memory.get(param_address(i))
-
-        def write_to_memory(result):
-            store_location = param_address(instruction.length - 2)  # last param [inst:0, param0:1, param1:2, param2:3]
-            self.memory.set(store_location, result)
-
-        # add
-        if instruction.code == 1:
-            instruction.length = 4
-            write_to_memory(param(0) + param(1))
-        # multiply
-        elif instruction.code == 2:
-            instruction.length = 4
-            write_to_memory(param(0) * param(1))
-        # read
-        elif instruction.code == 3:
-            instruction.length = 2
-            if len(self.input_list) > 0:
-                the_input = self.input_list[0]
-                self.input_list = self.input_list[1:]
-                write_to_memory(the_input)
+    def _execute_traced(self, steps=-1):
+        """
+        Runs one instruction at a time through handlers that keep their result, and records pointer, instruction
+        code, parameter words and result of every executed instruction in the ring buffer of the tracer. Consumed
+        input is logged to the recorder as well, if any.
+        Like _execute_steps it pauses after the given number of instructions, if any.
+        """
+        tracer = self.tracer
+        log = self.recorder.log if self.recorder is not None else None
+        records = tracer.records
+        pack = _TRACE_RECORD.pack_into
+        size = _TRACE_RECORD.size
+        end = len(records) * records.itemsize
+        offset = start = tracer.position * records.itemsize
+        wraps = 0
+        # the buffer wrapping around and the pause are checked together, at the offset where the next happens
+        chunk = offset
+        stop = end if steps < 0 else min(end, offset + steps * size)
+        mem = self.memory
+        decoded = mem.code.entries
+        ptr = self.pointer
+        while ptr is not None:
+            if offset == stop:
+                if steps >= 0:
+                    steps -= (offset - chunk) // size
+                    if steps == 0:
+                        self.pointer = ptr
+                        break
+                if offset == end:
+                    offset = 0
+                    wraps += 1
+                chunk = offset
+                stop = end if steps < 0 else min(end, offset + steps * size)
+
+            entry = decoded.get(ptr)
+            if entry is None:
+                entry = self._decode_traced(ptr)
+                decoded = mem.code.entries
+            handler, a, b, c, full_code = entry
+            next_ptr = handler(self, mem, ptr, a, b, c)
+            if next_ptr is None:
+                if self.state == _State.waiting_for_input:
+                    # the read did not run, packing its record would overwrite the oldest one
+                    break
+                next_ptr = self._continued_pointer()
+                decoded = mem.code.entries
+            if log is not None and full_code % 100 == 3:
+                log.append(self.recorder.instructions + (wraps * end + offset - start) // size)
+                log.append(self._result)
+            try:
+                pack(records, offset, ptr, full_code, a, b, c, self._result)
+            except struct.error:
+                tracer.record_clipped(offset // records.itemsize, (ptr, full_code, a, b, c, self._result))
+            offset += size
+            ptr = next_ptr
+
+        executed = (wraps * end + offset - start) // size
+        tracer.position = offset // records.itemsize
+        tracer.count += executed
+        if self.recorder is not None:
+            self.recorder.instructions += executed
+
+    def _execute_recorded(self, steps=-1):
+        """
+        Runs one instruction at a time through the traced handlers, counting the executed instructions, and logs
+        every consumed input value with the number of instructions executed before it to the recorder.
+        Like _execute_steps it pauses after the given number of instructions, if any.
+        """
+        recorder = self.recorder
+        log = recorder.log
+        count = recorder.instructions
+        mem = self.memory
+        decoded = mem.code.entries
+        ptr = self.pointer
+        while ptr is not None:
+            if steps == 0:
+                self.pointer = ptr
+                break
+            steps -= 1
+            entry = decoded.get(ptr)
+            if entry is None:
+                entry = self._decode_traced(ptr)
+                decoded = mem.code.entries
+            handler, a, b, c, full_code = entry
+            next_ptr = handler(self, mem, ptr, a, b, c)
+            if next_ptr is None:
+                if self.state == _State.waiting_for_input:
+                    break
+                next_ptr = self._continued_pointer()
+                decoded = mem.code.entries
+            if full_code % 100 == 3:
+                log.append(count)
+                log.append(self._result)
+            count += 1
+            ptr = next_ptr
+        recorder.instructions = count
+
+    def _check_instruments(self):
+        # the profiler interprets the program through its own loop, which neither traces nor records
+        if self.profiler is not None and (self.tracer is not None or self.recorder is not None):
+            raise ValueError("A profiled computer can be neither traced nor recorded")
+
+    def _select_code(self):
+        # decoded code either keeps the results of instructions or not, and is decoded again when that changes
+        traced = self.tracer is not None or self.recorder is not None
+        if traced != self._traced_code:
+            self.memory.clear_code()
+            self._traced_code = traced
+
+    def _decode_traced(self, pointer):
+        full_code = self.memory.get(pointer)
+        length = LENGTHS.get(full_code % 100, 1)
+        words = [self.memory.get(pointer + i) for i in range(1, length)] + [0] * (4 - length)
+        entry = (_traced_handler(full_code), words[0], words[1], words[2], full_code)
+        self.memory.own_code().register(pointer, entry, length)
+        return entry
+
+    def _decode(self, pointer):
+        """
+        Decodes the code at pointer once and caches its handler together with the raw parameter words.
+        Every word the handler covers is registered so that a write to it drops the cached entry.
+        """
+        handler = None
+        if self.compile_blocks:
+            handler, length = _compile_block(self.memory, pointer, self.memory.code.modified)
+            words = [0, 0, 0]
+        if handler is None:
+            full_code = self.memory.get(pointer)
+            handler = _handler(full_code)
+            length = LENGTHS[full_code % 100]
+            words = [self.memory.get(pointer + i) for i in range(1, length)] + [0] * (4 - length)
+
+        entry = (handler, words[0], words[1], words[2])
+        self.memory.own_code().register(pointer, entry, length)
+        return entry
+
+
+class AsyncIntcodeComputer(IntcodeComputer):
+    """
+    Intcode computer running as a coroutine: reads await an asyncio input queue and writes are put on an output
+    queue, so computers can be wired together through their queues and scheduled by the event loop.
+    """
+
+    def __init__(self, memory, input_queue=None, output_queue=None, slice_steps=1000, compile_blocks=False):
+        """
+        :param slice_steps: number of instructions after which the computer yields to the event loop, so that a long
+            computation does not starve other coroutines
+        """
+        super().__init__(memory, compile_blocks)
+        self.input_queue = asyncio.Queue() if input_queue is None else input_queue
+        self.output_queue = asyncio.Queue() if output_queue is None else output_queue
+        self.slice_steps = slice_steps
+
+    async def run_async(self):
+        self.state = _State.running
+        self._check_instruments()
+        self._select_code()
+        while True:
+            self._run_steps(self.slice_steps)
+            for value in self.take_output():
+                await self.output_queue.put(value)
+
+            if self.state == _State.done:
+                return self.memory.get(0)
+            elif self.state == _State.waiting_for_input:
+                self.input_list.append(await self.input_queue.get())
+                while not self.input_queue.empty():
+                    self.input_list.append(self.input_queue.get_nowait())
+                self.state = _State.running
             else:
-                self.state = _State.waiting_for_input
-                return  # don't move pointer
-        # write
-        elif instruction.code == 4:
-            instruction.length = 2
-            the_output = param(0)
-            if self.output_list is not None:
-                self.output_list.append(the_output)
-        # jump if true
-        elif instruction.code == 5:
-            instruction.length = 3
-            if param(0) > 0:
-                self.pointer = param(1)
-                return  # don't move the pointer
-        # jump if false
-        elif instruction.code == 6:
-            instruction.length = 3
-            if param(0) == 0:
-                self.pointer = param(1)
-                return  # don't move the pointer
-        # less than
-        elif instruction.code == 7:
-            instruction.length = 4
-            write_to_memory(1) if param(0) < param(1) else write_to_memory(0)
-        # equals
-        elif instruction.code == 8:
-            instruction.length = 4
-            write_to_memory(1) if param(0) == param(1) else write_to_memory(0)
-        # relative base offset
-        elif instruction.code == 9:
-            instruction.length = 2
-            self.relative_base += param(0)
-        # end
-        elif instruction.code == 99:
-            instruction.length = 1
-            self.state = _State.done
+                await asyncio.sleep(0)
+
+
+class CallbackInput:
+    """
+    Input channel that asks a function for the next value whenever the program reads.
+    The function returns None when there is no input yet, leaving the computer waiting for input.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        self.pending = None
+
+    def __bool__(self):
+        if self.pending is None:
+            self.pending = self.function()
+        return self.pending is not None
+
+    def popleft(self):
+        value = self.pending if self.pending is not None else self.function()
+        self.pending = None
+        return value
+
+    def copy(self):
+        other = CallbackInput(self.function)
+        other.pending = self.pending
+        return other
+
+
+class GeneratorInput:
+    """
+    Input channel reading lazily from an iterable; the computer waits for input once it is exhausted.
+    """
+
+    def __init__(self, iterable):
+        self.iterator = iter(iterable)
+        self.pending = []
+
+    def __bool__(self):
+        if not self.pending:
+            value = next(self.iterator, None)
+            if value is not None:
+                self.pending.append(value)
+        return len(self.pending) > 0
+
+    def popleft(self):
+        return self.pending.pop() if self.pending else next(self.iterator)
+
+    def copy(self):
+        self.iterator, iterator = tee(self.iterator)
+        other = GeneratorInput(iterator)
+        other.pending = self.pending.copy()
+        return other
+
+
+class CallbackOutput:
+    """
+    Output channel handing every value to a function as soon as the program writes it.
+    """
+
+    def __init__(self, function):
+        self.function = function
+
+    def append(self, value):
+        self.function(value)
+
+    def clear(self):
+        pass
+
+    def __iter__(self):
+        return iter(())
+
+    def copy(self):
+        return self
+
+
+class AsciiInput:
+    """
+    Input channel holding text (str or bytes) as one buffer that the program reads through an index, so that
+    reading neither slices nor converts the whole text into numbers. More text can be written at any time.
+    """
+
+    def __init__(self, text=b""):
+        self.buffer = bytearray(_ascii_bytes(text))
+        self.index = 0
+
+    def write(self, text):
+        if self.index == len(self.buffer):
+            # everything was read, start over instead of growing the buffer
+            self.buffer.clear()
+            self.index = 0
+        self.buffer += _ascii_bytes(text)
+
+    def __bool__(self):
+        return self.index < len(self.buffer)
+
+    def popleft(self):
+        value = self.buffer[self.index]
+        self.index += 1
+        return value
+
+    def copy(self):
+        other = AsciiInput(self.buffer)
+        other.index = self.index
+        return other
+
+
+class AsciiOutput:
+    """
+    Output channel collecting text into a bytearray. Values that are not ASCII characters, like the puzzle answers
+    of text based programs, go to a separate list of (text position, value) pairs. Complete lines can be read while
+    the program is still running.
+    """
+
+    def __init__(self):
+        self.text = bytearray()
+        self.values = []  # (position in text, value) of the values that are not ASCII characters
+        self.line_start = 0  # position in text of the first line not read yet
+
+    def append(self, value):
+        if 0 <= value < 128:
+            self.text.append(value)
         else:
-            raise Exception("Unknown instruction code", instruction.code)
+            self.values.append((len(self.text), value))
 
-        self.pointer += instruction.length
+    def readline(self):
+        """
+        :return: the next complete line without its line break, or None when no complete line was written yet
+        """
+        end = self.text.find(b"\n", self.line_start)
+        if end < 0:
+            return None
+        line = self.text[self.line_start:end].decode("ascii")
+        self.line_start = end + 1
+        return line
 
-    @staticmethod
-    def _code_with_param_modes(code):
-        instr = code % 100
-        modes = [code // 10 ** i % 10 for i in range(2, 5)]
-        return instr, modes
+    def lines(self):
+        line = self.readline()
+        while line is not None:
+            yield line
+            line = self.readline()
+
+    def clear(self):
+        self.text.clear()
+        self.values.clear()
+        self.line_start = 0
+
+    def __iter__(self):
+        # all values in the order they were written
+        start = 0
+        for position, value in self.values:
+            yield from self.text[start:position]
+            yield value
+            start = position
+        yield from self.text[start:]
+
+    def __str__(self):
+        # the text with the other values written out as numbers where they occurred
+        parts = []
+        start = 0
+        for position, value in self.values:
+            parts.append(self.text[start:position].decode("ascii"))
+            parts.append(str(value))
+            start = position
+        parts.append(self.text[start:].decode("ascii"))
+        return "".join(parts)
+
+    def copy(self):
+        other = AsciiOutput()
+        other.text = self.text.copy()
+        other.values = self.values.copy()
+        other.line_start = self.line_start
+        return other
+
+
+def _ascii_bytes(text):
+    return text.encode("ascii") if isinstance(text, str) else text
 
-    @staticmethod
-    def _decode_instruction(full_code):
-        (code, param_modes) = IntcodeComputer._code_with_param_modes(full_code)
-        return _Instruction(code, param_modes)
+
+class CancellationToken:
+    """
+    Cooperative cancellation of limited runs: a computer running with the token stops in the budget exhausted
+    state shortly after cancel() is called, from any thread.
+    """
+
+    def __init__(self):
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self):
+        return self._cancelled
 
 
 class _State:
     running = "r"
     done = "d"
     waiting_for_input = "i"
+    budget_exhausted = "b"
 
 
-class _Mode:
-    position = 0
-    immediate = 1
-    relative = 2
+class _DecodedCode:
+    """
+    Code decoded from memory, by the pointer it starts at. Every word a decoded entry covers is registered, so that
+    a write to it drops the entry.
+    """
 
+    def __init__(self):
+        self.entries = {}  # pointer -> (handler, param words), followed by the full code when traced
+        self.spans = {}  # pointer -> number of words the decoded handler covers
+        self.owners = {}  # address -> pointers of the decoded handlers covering it
+        self.modified = set()  # addresses of code words overwritten after they were decoded
 
-class _Instruction:
-    def __init__(self, code, param_modes=None):
-        if param_modes is None:
-            self.param_modes = []
-        else:
-            self.param_modes = param_modes
-        self.code = code
-        self.length = 0
+    def copy(self):
+        other = _DecodedCode()
+        other.entries = self.entries.copy()
+        other.spans = self.spans.copy()
+        other.owners = self.owners.copy()
+        other.modified = self.modified.copy()
+        return other
+
+    def register(self, pointer, entry, length):
+        self.entries[pointer] = entry
+        self.spans[pointer] = length
+        for address in range(pointer, pointer + length):
+            self.owners[address] = self.owners.get(address, ()) + (pointer,)
+
+    def invalidate(self, address):
+        self.modified.add(address)
+        for start in self.owners.pop(address, ()):
+            del self.entries[start]
+            for other in range(start, start + self.spans.pop(start)):
+                if other in self.owners:
+                    remaining = tuple(s for s in self.owners[other] if s != start)
+                    if remaining:
+                        self.owners[other] = remaining
+                    else:
+                        del self.owners[other]
 
 
 class _Memory:
+    """
+    Sparse memory made of fixed size pages, created on the first write to them. Forks share pages and a page is
+    copied the first time a side writes to it.
+    The code decoded from memory is kept with it, so that any write, by the program or not, drops the code it
+    overwrites. Forks share the decoded code as well, until either side decodes or drops code.
+    """
+
+    compact = False
+
     def __init__(self, mem):
-        self.mem = mem.copy()
+        self.pages = {i >> _PAGE_BITS: _new_page(mem[i:i + _PAGE_SIZE], self.compact)
+                      for i in range(0, len(mem), _PAGE_SIZE)}
+        self.size = len(mem)
+        self._writable = self.pages.copy()  # pages no fork shares, by index
+        self.code = _DecodedCode()
+        self._owns_code = True  # whether no fork shares the decoded code
+
+    @staticmethod
+    def from_pages(pages, size, compact=False):
+        memory = _new_memory([], compact)
+        memory.pages = {index: _new_page(page, compact) for index, page in pages.items()}
+        memory.size = size
+        memory._writable = memory.pages.copy()
+        return memory
+
+    def fork(self):
+        # built without __init__, which would create pages and decoded code only to replace them
+        other = type(self).__new__(type(self))
+        other.pages = self.pages.copy()
+        other.size = self.size
+        other._writable = {}
+        other.code = self.code
+        other._owns_code = self._owns_code = False
+        self._writable = {}
+        return other
+
+    def own_code(self):
+        """
+        :return: the decoded code, copied first if a fork shares it
+        """
+        if not self._owns_code:
+            self.code = self.code.copy()
+            self._owns_code = True
+        return self.code
+
+    def clear_code(self):
+        self.code = _DecodedCode()
+        self._owns_code = True
 
     def set(self, pointer, value):
-        if len(self.mem) <= pointer:
-            # extend memory if requested
-            self.mem = self.mem + ([0] * (pointer - len(self.mem) + 1))
-        self.mem[pointer] = value
+        """
+        :return: whether the write dropped decoded code
+        """
+        page = self._writable.get(pointer >> _PAGE_BITS)
+        if page is None:
+            page = self._own_page(pointer >> _PAGE_BITS)
+        page[pointer & _PAGE_MASK] = value
+        if pointer >= self.size:
+            self.size = pointer + 1
+        if pointer in self.code.owners:
+            self.own_code().invalidate(pointer)
+            return True
+        return False
 
     def get(self, pointer):
-        return 0 if len(self.mem) <= pointer else self.mem[pointer]
+        page = self.pages.get(pointer >> _PAGE_BITS)
+        return 0 if page is None else page[pointer & _PAGE_MASK]
 
     def dump(self):
-        return self.mem.copy()
+        """
+        :return: the words from address 0 to the highest address written. Raises ValueError when they would not fit
+            into the resident pages, as for a write far past the program, instead of listing every address between.
+        """
+        if self.size > len(self.pages) * _PAGE_SIZE:
+            raise ValueError("Memory is too sparse to dump", self.size)
+        return [self.get(i) for i in range(self.size)]
+
+    def resident_pages(self):
+        return len(self.pages)
+
+    def _own_page(self, index):
+        page = self.pages.get(index)
+        # a new page if the address was never written
+        page = _new_page([], self.compact) if page is None else page[:]
+        self.pages[index] = self._writable[index] = page
+        return page
+
+
+class _CompactMemory(_Memory):
+    """
+    Memory storing its pages as array('q'), 8 bytes per word and copied as a block, which turns a page into a list
+    when it has to hold a value beyond 64 bits.
+    """
+    compact = True
+
+    def set(self, pointer, value):
+        try:
+            return _Memory.set(self, pointer, value)
+        except OverflowError:
+            index = pointer >> _PAGE_BITS
+            self.pages[index] = self._writable[index] = list(self._writable[index])
+            return _Memory.set(self, pointer, value)
+
+
+def _new_memory(mem, compact=False):
+    return _CompactMemory(mem) if compact else _Memory(mem)
+
+
+_PAGE_BITS = 8
+_PAGE_SIZE = 1 << _PAGE_BITS
+_PAGE_MASK = _PAGE_SIZE - 1
+
+
+def _new_page(values, compact):
+    """
+    :param values: the first values of the page, taken as the page itself when they fill it and have its type
+    """
+    if len(values) == _PAGE_SIZE and type(values) is (array if compact else list):
+        return values
+    page = list(values) + [0] * (_PAGE_SIZE - len(values))
+    if compact:
+        try:
+            return array("q", page)
+        except OverflowError:
+            pass
+    return page
+
+
+# magic, pointer, relative base, state, memory size, compile blocks, compact memory, number of pages
+_CHECKPOINT_HEADER = struct.Struct("<4sqqcq??I")
+_CHECKPOINT_MAGIC = b"ICC1"
+_PAGE_INDEX = struct.Struct("<q")
+# kind of the values ("q" for 64 bit integers, "t" for comma separated text), length in bytes
+_INTS_HEADER = struct.Struct("<cI")
+
+
+def _pack_ints(values):
+    try:
+        packed = array("q", values)
+        if sys.byteorder == "big":
+            packed.byteswap()
+        data, kind = packed.tobytes(), b"q"
+    except OverflowError:
+        # values beyond 64 bits
+        data, kind = ",".join(map(str, values)).encode(), b"t"
+    return _INTS_HEADER.pack(kind, len(data)) + data
+
+
+def _unpack_ints(view, offset, compact=False):
+    """
+    :param compact: whether to return 64 bit integers as the array('q') they are read into instead of a list
+    """
+    kind, length = _INTS_HEADER.unpack_from(view, offset)
+    start = offset + _INTS_HEADER.size
+    data = view[start:start + length]
+    if kind == b"q":
+        values = array("q")
+        values.frombytes(data)
+        if sys.byteorder == "big":
+            values.byteswap()
+        if not compact:
+            values = values.tolist()
+    else:
+        values = [int(v) for v in bytes(data).split(b",") if v]
+    return values, start + length
+
+
+# opcodes that end a basic block: they wait for input, produce output, branch or halt
+_BLOCK_ENDS = {3, 4, 5, 6, 99}
+
+_MAX_BLOCK_INSTRUCTIONS = 64
+
+# steps run by limited runs between checks of their deadline and cancellation token
+_CHECK_STEPS = 1000
+
+# handlers specialised per full instruction code (opcode + parameter modes), generated on first use
+_handlers = {}
+
+# handlers that also store their result in comp._result, for tracing
+_traced_handlers = {}
+
+# a trace record: pointer, instruction code, the three parameter words and the result
+_TRACE_RECORD = struct.Struct("=6q")
+
+# generated functions by source, so that computers running the same program share compiled blocks
+_functions = {}
+
+
+def _handler(full_code):
+    handler = _handlers.get(full_code)
+    if handler is None:
+        lines = _instruction_source(full_code, "ptr", ("a", "b", "c"))
+        if full_code % 100 != 99:
+            lines.append(f"return ptr + {LENGTHS[full_code % 100]}")
+        handler = _handlers[full_code] = _compile_function(lines, f"<intcode {full_code}>")
+    return handler
+
+
+def _traced_handler(full_code):
+    handler = _traced_handlers.get(full_code)
+    if handler is None:
+        lines = _instruction_source(full_code, "ptr", ("a", "b", "c"), traced=True)
+        if full_code % 100 != 99:
+            lines.append(f"return ptr + {LENGTHS[full_code % 100]}")
+        handler = _traced_handlers[full_code] = _compile_function(lines, f"<traced intcode {full_code}>")
+    return handler
+
+
+def _compile_block(memory, pointer, modified_code):
+    """
+    Translates the basic block starting at pointer into a single function with the parameters inlined as constants.
+    The block stops early before an unknown instruction, one with an unknown parameter mode or one overlapping code
+    the program has overwritten, leaving it to the interpreter, as earlier instructions may still overwrite it.
+    Returns the function and the number of words it covers, or None when not even the first instruction can be
+    compiled.
+    """
+    instructions = []
+    address = pointer
+    for _ in range(_MAX_BLOCK_INSTRUCTIONS):
+        full_code = memory.get(address)
+        code = full_code % 100
+        length = LENGTHS.get(code)
+        if length is None or any(mode > RELATIVE for mode in _param_modes(full_code)[:length - 1]) \
+                or any(a in modified_code for a in range(address, address + length)):
+            break
+
+        instructions.append(Instruction(address, full_code, [memory.get(address + i) for i in range(1, length)]))
+        address += length
+        if code in _BLOCK_ENDS:
+            break
+
+    if not instructions:
+        return None, 0
+
+    lines = _block_source(instructions)
+    if lines[-1] != "return None":
+        lines.append(f"return {address}")
+    return _compile_function(lines, f"<intcode block {pointer}>"), address - pointer
+
+
+def _block_source(instructions):
+    """
+    Python statements executing a run of instructions, optimized through two peepholes: an add, multiply or compare
+    of immediate operands stores its precomputed value, and a compare followed by a jump on its result branches on
+    the comparison directly instead of reading the stored result back.
+    """
+    lines = []
+    fused = False
+    for instruction, following in zip(instructions, instructions[1:] + [None]):
+        if fused:
+            # the jump already ran as part of the compare
+            fused = False
+            continue
+
+        ptr = instruction.address
+        params = tuple(map(str, instruction.params)) + ("0",) * (3 - len(instruction.params))
+        value = instruction.constant_value()
+        if following is not None and instruction.fuses_with(following):
+            lines += _fused_source(instruction, following)
+            fused = True
+        elif value is not None:
+            lines += _write_source(instruction.modes[2], params[2], f"{ptr} + 3", str(value), f"{ptr} + 4")
+        else:
+            lines += _instruction_source(instruction.full_code, str(ptr), params)
+    return lines
+
+
+def _fused_source(compare, jump):
+    modes = compare.modes
+    params = [str(p) for p in compare.params]
+    operator = "<" if compare.code == 7 else "=="
+    ptr = compare.address
+    return [f"condition = {_read_source(modes[0], params[0])} {operator} {_read_source(modes[1], params[1])}"] \
+        + _write_source(modes[2], params[2], f"{ptr} + 3", "1 if condition else 0", f"{ptr} + 4") + [
+        f"if {'' if jump.code == 5 else 'not '}condition:",
+        f"    return {_read_source(jump.modes[1], str(jump.params[1]))}",
+    ]
+
+
+def _compile_function(lines, name):
+    source = "def handler(comp, mem, ptr, a, b, c):\n" + "".join("    " + line + "\n" for line in lines)
+    function = _functions.get(source)
+    if function is None:
+        namespace = {"_State": _State}
+        exec(compile(source, name, "exec"), namespace)
+        function = _functions[source] = namespace["handler"]
+    return function
+
+
+def _param_modes(full_code):
+    return [full_code // 10 ** i % 10 for i in range(2, 5)]
+
+
+def _read_source(mode, param):
+    if mode == POSITION:
+        return f"mem.get({param})"
+    elif mode == IMMEDIATE:
+        return param
+    elif mode == RELATIVE:
+        return f"mem.get(comp.relative_base + {param})"
+    else:
+        raise Exception("Unknown parameter mode", mode)
+
+
+def _write_source(mode, param, param_address, value, next_ptr):
+    if mode == POSITION:
+        address = param
+    elif mode == IMMEDIATE:
+        address = param_address
+    elif mode == RELATIVE:
+        address = f"comp.relative_base + {param}"
+    else:
+        raise Exception("Unknown parameter mode", mode)
+    return [
+        f"if mem.set({address}, {value}):",
+        "    # the decoded code changed, the run goes on from the pointer",
+        f"    comp.pointer = {next_ptr}",
+        "    return None",
+    ]
+
+
+def _instruction_source(full_code, ptr, params, traced=False):
+    """
+    Python statements executing the instruction located at ptr with the raw parameter words params.
+    Instructions that do not continue at the next instruction return the new pointer, or None after storing
+    the pointer when execution stops or the decoded code changed. Traced instructions also store their result in
+    comp._result: the value written to memory or output, the pointer after a jump and the relative base after
+    changing it.
+    """
+    code = full_code % 100
+    modes = _param_modes(full_code)
+    length = LENGTHS.get(code)
+    if length is None:
+        raise Exception("Unknown instruction code", code)
+    next_ptr = f"{ptr} + {length}"
+
+    def read(i):
+        return _read_source(modes[i], params[i])
+
+    def write(value):
+        i = length - 2  # last param [inst:0, param0:1, param1:2, param2:3]
+        if traced:
+            return [f"comp._result = result = {value}"] \
+                + _write_source(modes[i], params[i], f"{ptr} + {i + 1}", "result", next_ptr)
+        return _write_source(modes[i], params[i], f"{ptr} + {i + 1}", value, next_ptr)
+
+    def jump(condition):
+        if traced:
+            return [
+                f"if {condition}:",
+                f"    comp._result = {read(1)}",
+                "    return comp._result",
+                f"comp._result = {next_ptr}",
+            ]
+        return [
+            f"if {condition}:",
+            f"    return {read(1)}",
+        ]
 
+    # add
+    if code == 1:
+        return write(f"{read(0)} + {read(1)}")
+    # multiply
+    elif code == 2:
+        return write(f"{read(0)} * {read(1)}")
+    # read
+    elif code == 3:
+        return [
+            "if not comp.input_list:",
+            f"    comp.pointer = {ptr}",
+            "    comp.state = _State.waiting_for_input",
+            "    return None  # don't move pointer",
+            "the_input = comp.input_list.popleft()",
+        ] + write("the_input")
+    # write
+    elif code == 4:
+        if traced:
+            return [
+                f"comp._result = {read(0)}",
+                "if comp.output_list is not None:",
+                "    comp.output_list.append(comp._result)",
+            ]
+        return [
+            "if comp.output_list is not None:",
+            f"    comp.output_list.append({read(0)})",
+        ]
+    # jump if true
+    elif code == 5:
+        return jump(f"{read(0)} > 0")
+    # jump if false
+    elif code == 6:
+        return jump(f"{read(0)} == 0")
+    # less than
+    elif code == 7:
+        return write(f"1 if {read(0)} < {read(1)} else 0")
+    # equals
+    elif code == 8:
+        return write(f"1 if {read(0)} == {read(1)} else 0")
+    # relative base offset
+    elif code == 9:
+        return [f"comp.relative_base += {read(0)}"] + (["comp._result = comp.relative_base"] if traced else [])
+    # end
+    else:
+        return (["comp._result = 0"] if traced else []) + [
+            f"comp.pointer = {next_ptr}",
+            "comp.state = _State.done",
+            "return None",
+        ]
@@ -0,0 +1,234 @@
+from typing import Dict, List, Set
+
+MNEMONICS = {1: "ADD", 2: "MUL", 3: "IN", 4: "OUT", 5: "JT", 6: "JF", 7: "LT", 8: "EQ", 9: "RBO", 99: "HALT"}
+LENGTHS = {1: 4, 2: 4, 3: 2, 4: 2, 5: 3, 6: 3, 7: 4, 8: 4, 9: 2, 99: 1}
+
+POSITION = 0
+IMMEDIATE = 1
+RELATIVE = 2
+
+# opcodes whose last parameter is the address written to
+WRITING = {1, 2, 3, 7, 8}
+JUMPS = {5, 6}
+COMPARES = {7, 8}
+
+
+class Instruction:
+    def __init__(self, address, full_code, params):
+        self.address = address
+        self.full_code = full_code
+        self.code = full_code % 100
+        self.modes = [full_code // 10 ** i % 10 for i in range(2, 2 + len(params))]
+        self.params = params
+        self.length = 1 + len(params)
+
+    def next_address(self):
+        return self.address + self.length
+
+    def write_address(self):
+        """
+        :return: the address this instruction writes to if it is known statically, otherwise None
+        """
+        if self.code not in WRITING:
+            return None
+        elif self.modes[-1] == POSITION:
+            return self.params[-1]
+        elif self.modes[-1] == IMMEDIATE:
+            return self.address + self.length - 1
+        return None
+
+    def jump_target(self):
+        """
+        :return: the jump target if it is an immediate value, otherwise None
+        """
+        return self.params[1] if self.code in JUMPS and self.modes[1] == IMMEDIATE else None
+
+    def always_jumps(self):
+        if self.code not in JUMPS or self.modes[0] != IMMEDIATE:
+            return False
+        return (self.params[0] > 0) if self.code == 5 else (self.params[0] == 0)
+
+    def never_jumps(self):
+        if self.code not in JUMPS or self.modes[0] != IMMEDIATE:
+            return False
+        return not self.always_jumps()
+
+    def constant_value(self):
+        """
+        :return: the value written by an add, multiply or compare whose operands are both immediate, otherwise None
+        """
+        if self.code not in (1, 2, 7, 8) or self.modes[0] != IMMEDIATE or self.modes[1] != IMMEDIATE:
+            return None
+        a, b = self.params[0], self.params[1]
+        if self.code == 1:
+            return a + b
+        elif self.code == 2:
+            return a * b
+        elif self.code == 7:
+            return int(a < b)
+        return int(a == b)
+
+    def fuses_with(self, jump):
+        """
+        Whether this is a compare directly followed by a jump on its result, so that both can run as one operation.
+        """
+        return (self.code in COMPARES and jump.code in JUMPS and jump.address == self.next_address()
+                and self.modes[2] != IMMEDIATE and jump.modes[0] == self.modes[2] and jump.params[0] == self.params[2])
+
+    def ends_block(self):
+        return self.code in JUMPS or self.code == 99
+
+    def falls_through(self):
+        return self.code != 99 and not self.always_jumps()
+
+    def __repr__(self):
+        operands = " ".join(_operand(mode, param) for mode, param in zip(self.modes, self.params))
+        return f"{self.address:>6}: {MNEMONICS[self.code]:<4} {operands}".rstrip()
+
+
+class BasicBlock:
+    def __init__(self, start):
+        self.start = start
+        self.instructions: List[Instruction] = []
+        self.successors: List[int] = []
+        self.indirect = False  # ends with a jump whose target is only known at run time
+
+    def end(self):
+        return self.instructions[-1].next_address()
+
+    def __repr__(self):
+        exits = ", ".join(map(str, self.successors)) + (", ?" if self.indirect else "")
+        return f"Block {self.start}-{self.end() - 1} -> [{exits}]"
+
+
+class ControlFlowGraph:
+    """
+    Static view of an Intcode image: the instructions reachable from the entry point, split into basic blocks.
+
+    Code is found by following the control flow from address 0. Jumps whose target is not an immediate value
+    (returns through a stack in relative mode, for example) cannot be followed, so immediate values pushed on the
+    relative mode stack that point to a decodable instruction outside known code are treated as possible jump
+    targets, which is how Intcode programs store return addresses. Instructions writing to a statically known
+    address inside decoded code are reported as self-modifying.
+    """
+
+    def __init__(self, memory):
+        self.memory = memory
+        self.instructions: Dict[int, Instruction] = {}
+        self.jump_targets: Set[int] = set()
+        self.blocks: Dict[int, BasicBlock] = {}
+        self.self_modified: Set[int] = set()  # addresses of the instructions the program writes to
+        self._explore()
+        self._split_blocks()
+        self._find_self_modification()
+
+    def decode(self, address):
+        if not 0 <= address < len(self.memory):
+            return None
+        full_code = self.memory[address]
+        code = full_code % 100
+        length = LENGTHS.get(code)
+        if length is None or address + length > len(self.memory):
+            return None
+        instruction = Instruction(address, full_code, self.memory[address + 1:address + length])
+        if any(mode > RELATIVE for mode in instruction.modes):
+            return None
+        return instruction
+
+    def code_addresses(self):
+        return {a for i in self.instructions.values() for a in range(i.address, i.next_address())}
+
+    def listing(self):
+        lines = []
+        for start in sorted(self.blocks):
+            block = self.blocks[start]
+            lines.append(f"{block}")
+            for instruction in block.instructions:
+                marker = " *" if instruction.address in self.self_modified else ""
+                lines.append(f"  {instruction}{marker}")
+        return "\n".join(lines)
+
+    def _explore(self):
+        code = set()
+        pointers = []
+        pending = [0]
+        while pending:
+            while pending:
+                address = pending.pop()
+                while address not in self.instructions:
+                    instruction = self.decode(address)
+                    if instruction is None:
+                        break
+                    self.instructions[address] = instruction
+                    code.update(range(address, instruction.next_address()))
+
+                    target = instruction.jump_target()
+                    if target is not None and not instruction.never_jumps():
+                        self.jump_targets.add(target)
+                        pending.append(target)
+                    pointers += self._stored_code_pointer(instruction)
+
+                    if not instruction.falls_through():
+                        break
+                    address = instruction.next_address()
+
+            # stored pointers are only followed once the control flow is exhausted, and not into decoded code
+            for pointer in pointers:
+                if pointer not in code:
+                    self.jump_targets.add(pointer)
+                    pending.append(pointer)
+            pointers = []
+
+    def _stored_code_pointer(self, instruction):
+        # a return address is pushed on the stack (relative mode) as an immediate value added to 0 or multiplied by 1
+        if instruction.code not in (1, 2) or instruction.modes != [IMMEDIATE, IMMEDIATE, RELATIVE]:
+            return []
+        a, b = instruction.params[0], instruction.params[1]
+        value = a + b if instruction.code == 1 else a * b
+        return [value] if value in (a, b) and self.decode(value) is not None else []
+
+    def _split_blocks(self):
+        leaders = {0} | (self.jump_targets & set(self.instructions))
+        for instruction in self.instructions.values():
+            if instruction.ends_block():
+                leaders.add(instruction.next_address())
+
+        for start in sorted(leaders & set(self.instructions)):
+            block = BasicBlock(start)
+            address = start
+            while address in self.instructions:
+                instruction = self.instructions[address]
+                block.instructions.append(instruction)
+                address = instruction.next_address()
+                if instruction.ends_block() or address in leaders:
+                    break
+
+            last = block.instructions[-1]
+            if last.code in JUMPS and not last.never_jumps():
+                if last.jump_target() is None:
+                    block.indirect = True
+                else:
+                    block.successors.append(last.jump_target())
+            if last.falls_through() and last.next_address() in self.instructions:
+                block.successors.append(last.next_address())
+            self.blocks[start] = block
+
+    def _find_self_modification(self):
+        # the instruction containing each code word
+        owners = {a: i.address for i in self.instructions.values() for a in range(i.address, i.next_address())}
+        for instruction in self.instructions.values():
+            address = instruction.write_address()
+            if address in owners:
+                self.self_modified.add(owners[address])
+
+
+def _operand(mode, param):
+    if mode == POSITION:
+        return f"[{param}]"
+    elif mode == IMMEDIATE:
+        return f"#{param}"
+    return f"[rb{param:+d}]"
+
+
+def disassemble(memory):
+    return ControlFlowGraph(memory).listing()
@@ -0,0 +1,159 @@
+import heapq
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from aoc09.tools.incode_computer import IntcodeComputer
+
+BFS = "bfs"
+DFS = "dfs"
+BEST_FIRST = "best first"
+
+
+class GridProtocol:
+    """
+    Protocol of the repair droid of day 15: moves 1 to 4 go north, south, west and east, and the droid replies 0
+    when it hit a wall and stayed, 1 when it moved and 2 when it moved onto the goal.
+    """
+    moves = {1: (0, 1), 2: (0, -1), 3: (-1, 0), 4: (1, 0)}
+
+    def neighbours(self, position):
+        """
+        :return: (move, position the move leads to) for every possible move
+        """
+        x, y = position
+        return [(move, (x + dx, y + dy)) for move, (dx, dy) in self.moves.items()]
+
+    def is_open(self, reply):
+        return reply != 0
+
+    def is_goal(self, reply):
+        return reply == 2
+
+
+class Explorer:
+    """
+    Searches the world of a droid program, a program that takes a move as input and replies what happened. Every
+    state is the computer of a droid that reached a position, and each position is expanded only once: a move is
+    tried by forking the computer of the droid that first reached the position it starts from.
+
+    States are expanded in batches taken from the frontier in the order of the mode: breadth first, depth first or
+    best first by a heuristic. With more than one worker the states of a batch are expanded in parallel by worker
+    processes, which get the computers as checkpoints, while the visited positions are kept by this process and
+    filtered out before a batch is sent. Depth and best first searches then expand a batch speculatively instead
+    of strictly one state after the other.
+    """
+
+    def __init__(self, program, protocol=None, mode=BFS, heuristic=None, workers=1, batch_size=None,
+                 start=(0, 0)):
+        """
+        :param program: the program, or a computer already running it
+        :param heuristic: function of a position and its distance from the start returning its priority for best
+            first search, lowest first
+        """
+        self.image = program if isinstance(program, IntcodeComputer) else IntcodeComputer(program)
+        self.protocol = GridProtocol() if protocol is None else protocol
+        self.mode = mode
+        self.heuristic = heuristic
+        self.workers = workers
+        self.batch_size = batch_size if batch_size is not None else (1 if workers <= 1 else workers * 8)
+        self.start = start
+        self.replies = {start: None}  # position -> reply to the move onto it, None for the start
+        self.distances = {start: 0}  # open position -> number of moves it was first reached in
+        self.goal = None  # (position, distance, computer) of the first goal found
+        self.expanded = 0
+        self.seconds = 0
+
+    def explore(self, stop_at_goal=True):
+        """
+        :return: the position, distance and computer of the first goal found, or None
+        """
+        started = time.perf_counter()
+        frontier = _Frontier(self.mode, self.heuristic)
+        frontier.push(self.start, 0, self.image)
+        executor = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        try:
+            while frontier:
+                batch = frontier.pop(self.batch_size)
+                moves = [self._unvisited_moves(position) for position, _, _ in batch]
+                jobs = [(computer, [move for move, _ in node_moves], self.protocol)
+                        for (_, _, computer), node_moves in zip(batch, moves)]
+                if executor is None:
+                    results = [_expand(*job) for job in jobs]
+                else:
+                    results = executor.map(_expand, *zip(*jobs))
+
+                for (_, distance, _), node_moves, children in zip(batch, moves, results):
+                    self.expanded += 1
+                    for (_, position), (reply, child) in zip(node_moves, children):
+                        self.replies[position] = reply
+                        if not self.protocol.is_open(reply):
+                            continue
+                        self.distances[position] = distance + 1
+                        if self.goal is None and self.protocol.is_goal(reply):
+                            self.goal = (position, distance + 1, child)
+                            if stop_at_goal:
+                                return self.goal
+                        frontier.push(position, distance + 1, child)
+            return self.goal
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            self.seconds += time.perf_counter() - started
+
+    def statistics(self):
+        return {
+            "expanded": self.expanded,
+            "positions": len(self.replies),
+            "seconds": self.seconds,
+            "nodes_per_second": self.expanded / self.seconds if self.seconds else 0,
+        }
+
+    def _unvisited_moves(self, position):
+        moves = [(move, target) for move, target in self.protocol.neighbours(position) if target not in self.replies]
+        for _, target in moves:
+            # reserved, so that no other state of the batch tries it
+            self.replies[target] = None
+        return moves
+
+
+class _Frontier:
+    def __init__(self, mode, heuristic):
+        if mode == BEST_FIRST and heuristic is None:
+            raise ValueError("Best first search needs a heuristic")
+        self.mode = mode
+        self.heuristic = heuristic
+        self.nodes = deque() if mode != BEST_FIRST else []
+        self._order = itertools.count()  # ties in best first search go to the earlier state
+
+    def push(self, position, distance, computer):
+        if self.mode == BEST_FIRST:
+            heapq.heappush(self.nodes, (self.heuristic(position, distance), next(self._order),
+                                        (position, distance, computer)))
+        else:
+            self.nodes.append((position, distance, computer))
+
+    def pop(self, count):
+        count = min(count, len(self.nodes))
+        if self.mode == BFS:
+            return [self.nodes.popleft() for _ in range(count)]
+        elif self.mode == DFS:
+            return [self.nodes.pop() for _ in range(count)]
+        return [heapq.heappop(self.nodes)[2] for _ in range(count)]
+
+    def __bool__(self):
+        return len(self.nodes) > 0
+
+
+def _expand(computer, moves, protocol):
+    """
+    :return: (reply, computer after the move) for each move, leaving out the computers of moves into walls
+    """
+    children = []
+    for move in moves:
+        child = computer.fork()
+        child.continue_run([move])
+        reply = child.take_output()[-1]
+        children.append((reply, child if protocol.is_open(reply) else None))
+    return children
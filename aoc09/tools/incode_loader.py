@@ -0,0 +1,91 @@
+import hashlib
+import mmap
+import os
+import struct
+from array import array
+from typing import List
+
+# magic, modification time of the source in nanoseconds, program length and SHA-256 of the source
+_HEADER = struct.Struct("<4sqq32s")
+_MAGIC = b"ICP1"
+
+CACHE_FOLDER = "__intcode_cache__"
+
+
+def load_program(file: str, folder: str = "../input/") -> List[int]:
+    """
+    Reads an Intcode program from its comma separated source, like list(map(int, read_input(file, ",", folder))),
+    and caches the parsed program as a binary array of 64 bit integers next to the source. Later loads map the
+    cache into memory instead of parsing the text again, as long as the source keeps its modification time, or
+    its content when only the time changed. Programs with values beyond 64 bits are parsed every time.
+    """
+    source = os.path.join(folder, file)
+    cache = os.path.join(folder, CACHE_FOLDER, file + ".icp")
+    mtime = os.stat(source).st_mtime_ns
+
+    header = _read_header(cache)
+    if header is not None and header[1] == mtime:
+        program = _read_cache(cache, header[2])
+        if program is not None:
+            return program
+
+    with open(source, "rb") as text:
+        data = text.read()
+    digest = hashlib.sha256(data).digest()
+    program = None
+    if header is not None and header[3] == digest:
+        # touched but unchanged
+        program = _read_cache(cache, header[2])
+    if program is None:
+        program = [int(value) for value in data.decode().replace("\n", ",").split(",") if value.strip()]
+
+    _write_cache(cache, mtime, digest, program)
+    return program
+
+
+def _read_header(cache):
+    try:
+        with open(cache, "rb") as binary:
+            header = _HEADER.unpack(binary.read(_HEADER.size))
+    except (OSError, struct.error):
+        return None
+    return header if header[0] == _MAGIC else None
+
+
+def _read_cache(cache, length):
+    """
+    :return: the cached program, or None when the cache cannot be read or is shorter than its header says
+    """
+    try:
+        with open(cache, "rb") as binary, mmap.mmap(binary.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if len(mapped) < _HEADER.size + 8 * length:
+                return None
+            with memoryview(mapped) as whole, whole[_HEADER.size:_HEADER.size + 8 * length] as part, \
+                    part.cast("q") as values:
+                return values.tolist()
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache, mtime, digest, program):
+    """
+    Writes the cache on a best effort basis: when it cannot be written, for example in a read only folder, the
+    program is simply parsed again next time.
+    """
+    try:
+        values = array("q", program)
+    except OverflowError:
+        return
+    # written aside and moved into place, so that concurrent loads never see a partial cache
+    temporary = f"{cache}.{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(cache), exist_ok=True)
+        with open(temporary, "wb") as binary:
+            binary.write(_HEADER.pack(_MAGIC, mtime, len(values), digest))
+            values.tofile(binary)
+        os.replace(temporary, cache)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
@@ -0,0 +1,85 @@
+"""
+Instruction-count reduction of the peephole optimizations applied to compiled blocks, on the puzzle programs of every
+Intcode day: adds, multiplies and compares of immediate operands are folded into stores of their value, and a
+compare followed by a jump on its result is fused into one operation.
+
+The static columns only cover the code found by following the control flow from the entry point. Programs that
+jump through values computed at run time (day 5 and 7 jump through a table of opcodes, for example) or write code
+they then run execute instructions the static view never decoded; their static counts are marked with an asterisk.
+
+    python -m aoc09.tools.incode_optimizer
+"""
+import argparse
+
+from aoc09.tools.incode_benchmark import WORKLOADS
+from aoc09.tools.incode_computer import IntcodeComputer
+from aoc09.tools.incode_disassembler import ControlFlowGraph
+from aoc09.tools.incode_loader import load_program
+from aoc09.tools.incode_profiler import IntcodeProfiler
+
+
+def peephole_counts(memory, executions=None):
+    """
+    Counts the instructions of a program that are folded or fused, leaving out instructions the program may
+    overwrite. Fusing a compare and a jump saves one instruction.
+
+    :param executions: executions per address of a profiled run, to count executed instructions as well, and the
+        executed addresses outside the statically decoded code as "undecoded"
+    """
+    graph = ControlFlowGraph(memory)
+    instructions = [i for i in graph.instructions.values() if i.address not in graph.self_modified]
+    folded = [i for i in instructions if i.constant_value() is not None]
+    fused = [i for i in instructions
+             if i.next_address() in graph.instructions and i.next_address() not in graph.self_modified
+             and i.fuses_with(graph.instructions[i.next_address()])]
+
+    counts = {
+        "instructions": len(graph.instructions),
+        "folded": len(folded),
+        "fused": len(fused),
+        "reduction": len(fused) / max(len(graph.instructions), 1),
+    }
+    if executions is not None:
+        total = sum(executions.values())
+        counts["executed"] = total
+        counts["executed_folded"] = sum(executions[i.address] for i in folded)
+        counts["executed_fused"] = sum(executions[i.address] for i in fused)
+        counts["executed_reduction"] = counts["executed_fused"] / max(total, 1)
+        counts["undecoded"] = sum(1 for address in executions if address not in graph.instructions)
+    return counts
+
+
+def report_all(folder="input/"):
+    results = []
+    for workload in WORKLOADS:
+        program = load_program(workload.__name__, folder)
+        profiler = IntcodeProfiler()
+
+        def new_profiled_computer(memory):
+            computer = IntcodeComputer(memory)
+            computer.profiler = profiler
+            return computer
+
+        workload(new_profiled_computer, program)
+        results.append(dict(program=workload.__name__, **peephole_counts(program, profiler.executions)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--input-folder", default="input/")
+    args = parser.parse_args()
+
+    print(f"{'program':<8} {'static':>7} {'folded':>7} {'fused':>6} {'saved':>7} "
+          f"{'executed':>10} {'folded':>9} {'fused':>9} {'saved':>7}")
+    results = report_all(args.input_folder)
+    for r in results:
+        static = f"{r['instructions']}{'*' if r['undecoded'] else ''}"
+        print(f"{r['program']:<8} {static:>7} {r['folded']:>7} {r['fused']:>6} {r['reduction']:>7.1%} "
+              f"{r['executed']:>10} {r['executed_folded']:>9} {r['executed_fused']:>9} {r['executed_reduction']:>7.1%}")
+    if any(r["undecoded"] for r in results):
+        print("* the program executed instructions outside the statically decoded code, its static counts are partial")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import json
+from collections import Counter
+
+
+class IntcodeProfiler:
+    """
+    Collects where an Intcode program spends its time: executions per address and per instruction code (opcode
+    with parameter modes), and reads and writes per memory address. Attach it to a computer to profile its runs:
+
+        computer.profiler = IntcodeProfiler(json_path="day9.json", print_report=True)
+
+    A profiled computer cannot have a tracer or an input recorder at the same time.
+    """
+
+    def __init__(self, json_path=None, print_report=False):
+        """
+        :param json_path: file to dump the counts to as JSON when the program halts
+        :param print_report: whether to print the report when the program halts
+        """
+        self.json_path = json_path
+        self.print_report = print_report
+        self.executions = Counter()  # address -> executions of the instruction there
+        self.codes = Counter()  # full instruction code -> executions
+        self.reads = Counter()  # address -> operand reads
+        self.writes = Counter()  # address -> writes
+
+    def watch(self, memory):
+        return _CountingMemory(memory, self)
+
+    def count_instruction(self, pointer, full_code):
+        self.executions[pointer] += 1
+        self.codes[full_code] += 1
+
+    def halted(self):
+        if self.json_path is not None:
+            with open(self.json_path, "w") as out:
+                json.dump(self.to_dict(), out, indent=2)
+        if self.print_report:
+            print(self.report())
+
+    def total(self):
+        return sum(self.executions.values())
+
+    def to_dict(self):
+        return {
+            "instructions": self.total(),
+            "executions": _sorted(self.executions),
+            "codes": _sorted(self.codes),
+            "reads": _sorted(self.reads),
+            "writes": _sorted(self.writes),
+        }
+
+    def report(self, top=10):
+        total = max(self.total(), 1)
+        lines = [f"{self.total()} instructions executed"]
+        for title, counts in [("Hot addresses", self.executions), ("Hot instruction codes", self.codes)]:
+            lines.append(title)
+            lines += [f"  {key:>8} {count:>10} {100 * count / total:6.2f}%" for key, count in counts.most_common(top)]
+        for title, counts in [("Most read addresses", self.reads), ("Most written addresses", self.writes)]:
+            lines.append(title)
+            lines += [f"  {key:>8} {count:>10}" for key, count in counts.most_common(top)]
+        return "\n".join(lines)
+
+
+def _sorted(counts):
+    return {str(key): count for key, count in counts.most_common()}
+
+
+class _CountingMemory:
+    def __init__(self, memory, profiler):
+        self.memory = memory
+        self.reads = profiler.reads
+        self.writes = profiler.writes
+
+    def get(self, pointer):
+        self.reads[pointer] += 1
+        return self.memory.get(pointer)
+
+    def set(self, pointer, value):
+        self.writes[pointer] += 1
+        return self.memory.set(pointer, value)
@@ -0,0 +1,73 @@
+import struct
+import sys
+from array import array
+from collections import deque
+
+from aoc09.tools.incode_computer import IntcodeComputer
+
+_HEADER = struct.Struct("<4sqq")
+_MAGIC = b"ICR1"
+
+
+class InputRecorder:
+    """
+    Log of the input consumed by a computer, as pairs of the number of instructions the computer had executed
+    when it read a value and the value, kept in a 64 bit integer array. Attach it to a computer to record its runs,
+    for example an interactive session, and replay the log headless later:
+
+        computer.recorder = InputRecorder()
+
+    Recording works alongside a tracer, but not on a profiled computer.
+    """
+
+    def __init__(self):
+        self.instructions = 0  # instructions executed by the recorded runs
+        self.log = array("q")  # instruction count, value, instruction count, value, ...
+
+    def entries(self):
+        return list(zip(self.log[::2], self.log[1::2]))
+
+    def inputs(self):
+        return self.log[1::2].tolist()
+
+    def save(self, path):
+        log = array("q", self.log)
+        if sys.byteorder == "big":
+            log.byteswap()
+        with open(path, "wb") as out:
+            out.write(_HEADER.pack(_MAGIC, self.instructions, len(log) // 2))
+            log.tofile(out)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as recording:
+            data = recording.read()
+        magic, instructions, count = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not an Intcode input recording")
+
+        recorder = InputRecorder()
+        recorder.instructions = instructions
+        recorder.log.frombytes(data[_HEADER.size:_HEADER.size + 16 * count])
+        if sys.byteorder == "big":
+            recorder.log.byteswap()
+        return recorder
+
+
+def replay(program, recorder, verify=False, compile_blocks=False):
+    """
+    Runs the program on the recorded input. The program being deterministic, it reads every value at the same
+    point as in the recorded runs, which verify checks by recording the replay too.
+
+    :return: the computer after running the program until it halted or waited for more input
+    """
+    computer = IntcodeComputer(program, compile_blocks)
+    if verify:
+        computer.recorder = InputRecorder()
+    computer.run(deque(recorder.inputs()))
+
+    if verify and computer.recorder.log != recorder.log:
+        ours, theirs = computer.recorder.entries(), recorder.entries()
+        diverged = next((i for i, (a, b) in enumerate(zip(ours, theirs)) if a != b), min(len(ours), len(theirs)))
+        raise ValueError("Replay diverged from the recording at input", diverged)
+    return computer
@@ -0,0 +1,100 @@
+import struct
+import sys
+from array import array
+
+from aoc09.tools.incode_disassembler import Instruction, LENGTHS
+
+# pointer, instruction code, the three parameter words and the result of an instruction
+FIELDS = 6
+
+_HEADER = struct.Struct("<4sqq")
+_MAGIC = b"ICT1"
+_INT64_MIN = -2 ** 63
+_INT64_MAX = 2 ** 63 - 1
+
+
+class TraceRecord:
+    def __init__(self, pointer, full_code, words, result):
+        self.pointer = pointer
+        self.full_code = full_code
+        self.words = words
+        self.result = result
+
+    def instruction(self):
+        return Instruction(self.pointer, self.full_code, list(self.words[:LENGTHS.get(self.full_code % 100, 1) - 1]))
+
+    def __repr__(self):
+        return f"{self.instruction()!r:<36} -> {self.result}"
+
+
+class IntcodeTracer:
+    """
+    Keeps the last instructions executed by a computer in a ring buffer preallocated as a 64 bit integer array, so
+    that tracing does not allocate while running and can stay enabled to look back after a failure:
+
+        computer.tracer = IntcodeTracer(capacity=10000)
+
+    Values that do not fit into 64 bits are clipped.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.records = array("q", bytes(8 * FIELDS * capacity))
+        self.position = 0  # index of the next record to write in records
+        self.count = 0  # number of instructions recorded, including the ones overwritten since
+
+    def record_clipped(self, index, values):
+        for offset, value in enumerate(values):
+            self.records[index + offset] = min(max(value, _INT64_MIN), _INT64_MAX)
+
+    def last(self, n=None):
+        """
+        :return: the last n recorded instructions (all the buffer holds by default), oldest first
+        """
+        return _to_records(self._ordered(), n)
+
+    def save(self, path):
+        """
+        Exports the recorded instructions, oldest first, to a binary file that read_trace reads back.
+        """
+        ordered = self._ordered()
+        if sys.byteorder == "big":
+            ordered.byteswap()
+        with open(path, "wb") as out:
+            out.write(_HEADER.pack(_MAGIC, self.capacity, self.count))
+            ordered.tofile(out)
+
+    def clear(self):
+        self.position = 0
+        self.count = 0
+
+    def _ordered(self):
+        if self.count < self.capacity:
+            return self.records[:self.position]
+        return self.records[self.position:] + self.records[:self.position]
+
+
+def read_trace(path, n=None):
+    """
+    Reads a trace saved by IntcodeTracer.save.
+
+    :return: the last n instructions of the trace (all of them by default), oldest first
+    """
+    with open(path, "rb") as trace:
+        data = trace.read()
+    magic, _, _ = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        raise ValueError("Not an Intcode trace")
+
+    values = array("q")
+    values.frombytes(data[_HEADER.size:])
+    if sys.byteorder == "big":
+        values.byteswap()
+    return _to_records(values, n)
+
+
+def _to_records(values, n):
+    count = len(values) // FIELDS
+    first = 0 if n is None else max(count - n, 0)
+    return [TraceRecord(values[i], values[i + 1], tuple(values[i + 2:i + 5]), values[i + 5])
+            for i in range(first * FIELDS, count * FIELDS, FIELDS)]
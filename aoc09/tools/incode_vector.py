@@ -0,0 +1,145 @@
+import time
+
+import numpy as np
+
+from aoc09.tools.incode_computer import IntcodeComputer
+
+RUNNING = 0
+WAITING_FOR_INPUT = 1
+DONE = 2
+
+# instruction length by opcode, 0 for unknown opcodes
+_LENGTHS = np.zeros(100, dtype=np.int64)
+_LENGTHS[[1, 2, 3, 4, 5, 6, 7, 8, 9, 99]] = [4, 4, 2, 2, 3, 3, 4, 4, 2, 1]
+
+
+class LockstepIntcode:
+    """
+    Many instances of one Intcode program held as NumPy arrays (a memory matrix with a row per instance, pointer and
+    relative base vectors) and advanced together, one instruction per step, with masked vectorized operations.
+    Memory holds 64 bit integers, so programs producing larger values are not supported.
+    """
+
+    def __init__(self, program, count):
+        self.memory = np.tile(np.array(program, dtype=np.int64), (count, 1))
+        self.pointer = np.zeros(count, dtype=np.int64)
+        self.relative_base = np.zeros(count, dtype=np.int64)
+        self.state = np.full(count, RUNNING, dtype=np.int8)
+        self.output_lists = [[] for _ in range(count)]
+        self.steps = 0
+
+    def run(self, input_lists):
+        """
+        Gives every instance its own input list and runs until each of them halted or waits for more input.
+
+        :param input_lists: one list of input values per instance
+        :return: the output produced by each instance
+        """
+        count = len(self.pointer)
+        width = max([len(values) for values in input_lists] + [1])
+        self._inputs = np.zeros((count, width), dtype=np.int64)
+        for i, values in enumerate(input_lists):
+            self._inputs[i, :len(values)] = values
+        self._input_lengths = np.array([len(values) for values in input_lists], dtype=np.int64)
+        self._input_positions = np.zeros(count, dtype=np.int64)
+
+        self.state[self.state == WAITING_FOR_INPUT] = RUNNING
+        rows = np.flatnonzero(self.state == RUNNING)
+        while len(rows) > 0:
+            self._step(rows)
+            self.steps += 1
+            rows = np.flatnonzero(self.state == RUNNING)
+
+        return self.output_lists
+
+    def _read(self, rows, addresses):
+        inside = (addresses >= 0) & (addresses < self.memory.shape[1])
+        values = self.memory[rows, np.where(inside, addresses, 0)]
+        return np.where(inside, values, 0)
+
+    def _step(self, rows):
+        ptr = self.pointer[rows]
+        rb = self.relative_base[rows]
+        full_code = self._read(rows, ptr)
+        code = full_code % 100
+        length = _LENGTHS[code]
+        if (length == 0).any():
+            raise Exception("Unknown instruction code", int(code[length == 0][0]))
+
+        addresses = []
+        for i in range(3):
+            mode = full_code // 10 ** (i + 2) % 10
+            used = length > i + 1
+            if (used & (mode > 2)).any():
+                raise Exception("Unknown parameter mode", int(mode[used & (mode > 2)][0]))
+            word = self._read(rows, ptr + i + 1)
+            addresses.append(np.where(mode == 0, word, np.where(mode == 2, rb + word, ptr + i + 1)))
+        param_0 = self._read(rows, addresses[0])
+        param_1 = self._read(rows, addresses[1])
+
+        # read
+        reading = code == 3
+        has_input = self._input_positions[rows] < self._input_lengths[rows]
+        waiting = reading & ~has_input
+        taking = reading & has_input
+        the_input = self._inputs[rows, np.minimum(self._input_positions[rows], self._inputs.shape[1] - 1)]
+        self._input_positions[rows[taking]] += 1
+
+        # add, multiply, less than, equals and read write to memory
+        result = np.select(
+            [code == 1, code == 2, code == 7, code == 8, taking],
+            [param_0 + param_1, param_0 * param_1, param_0 < param_1, param_0 == param_1, the_input])
+        writing = (code == 1) | (code == 2) | (code == 7) | (code == 8) | taking
+        target = np.where(reading, addresses[0], addresses[2])
+        if writing.any():
+            self._write(rows[writing], target[writing], result[writing])
+
+        # write
+        for i, value in zip(rows[code == 4], param_0[code == 4]):
+            self.output_lists[i].append(int(value))
+
+        # relative base offset
+        self.relative_base[rows] = rb + np.where(code == 9, param_0, 0)
+
+        # jumps, the pointer stays on a read waiting for input
+        jumping = ((code == 5) & (param_0 > 0)) | ((code == 6) & (param_0 == 0))
+        self.pointer[rows] = np.where(jumping, param_1, np.where(waiting, ptr, ptr + length))
+
+        self.state[rows[waiting]] = WAITING_FOR_INPUT
+        self.state[rows[code == 99]] = DONE
+
+    def _write(self, rows, addresses, values):
+        if (addresses < 0).any():
+            raise Exception("Negative memory address", int(addresses[addresses < 0][0]))
+        size = self.memory.shape[1]
+        if addresses.max() >= size:
+            # extend memory if requested, at least doubling it
+            new_size = max(int(addresses.max()) + 1, 2 * size)
+            self.memory = np.pad(self.memory, ((0, 0), (0, new_size - size)))
+        self.memory[rows, addresses] = values
+
+
+def compare_with_scalar(program, input_lists):
+    """
+    Runs one instance per input list both in lockstep and one by one on IntcodeComputer.
+
+    :return: the wall time of both, the speedup of lockstep execution and whether the outputs match
+    """
+    start = time.perf_counter()
+    lockstep_output = LockstepIntcode(program, len(input_lists)).run(input_lists)
+    lockstep_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scalar_output = []
+    for values in input_lists:
+        computer = IntcodeComputer(program)
+        computer.run(list(values))
+        scalar_output.append(computer.output_list)
+    scalar_time = time.perf_counter() - start
+
+    return {
+        "lockstep_seconds": lockstep_time,
+        "scalar_seconds": scalar_time,
+        "speedup": scalar_time / lockstep_time,
+        "outputs_match": lockstep_output == scalar_output,
+    }
@@ -0,0 +1,130 @@
+import time
+from collections import deque
+
+from aoc09.tools.incode_computer import IntcodeComputer
+
+ROUND_ROBIN = "round robin"
+READINESS = "readiness"
+
+
+class Network:
+    """
+    Intcode computers running the same program, connected by packets. Every computer first gets its network
+    address as input, then reads the packets sent to it as pairs of values from its inbox, or the empty value when
+    the inbox is empty. Its output is read three values at a time as packets (destination address, x, y), queued
+    on the inbox of the destination, or on the outbox for addresses outside the network.
+
+    With round robin scheduling every computer runs in turn until it waits for input. With readiness scheduling
+    only computers with packets in their inbox run, and the others are polled with the empty value once no packets
+    are pending. The network is idle when every computer polled its empty inbox without sending anything.
+    """
+
+    def __init__(self, program, size, scheduling=ROUND_ROBIN, empty_value=-1, slice_steps=None,
+                 compile_blocks=False):
+        """
+        :param slice_steps: number of instructions after which a computer yields to the others, by default it runs
+            until it waits for input
+        """
+        image = IntcodeComputer(program, compile_blocks)
+        self.computers = [image.fork() for _ in range(size)]
+        self.inboxes = [deque([address]) for address in range(size)]
+        for computer, inbox in zip(self.computers, self.inboxes):
+            computer.input_list = inbox
+        self.outbox = deque()  # packets sent outside the network
+        self.scheduling = scheduling
+        self.empty_value = empty_value
+        self.slice_steps = slice_steps
+        self.packets = 0
+        self.seconds = 0
+        self._pending_output = [[] for _ in range(size)]  # values of packets not completely sent yet
+        self._ready = deque(range(size))  # addresses with packets to read, for readiness scheduling
+        self._queued = set(range(size))
+
+    def send(self, address, x, y):
+        self.packets += 1
+        if 0 <= address < len(self.computers):
+            self.inboxes[address].extend((x, y))
+            if address not in self._queued:
+                self._queued.add(address)
+                self._ready.append(address)
+        else:
+            self.outbox.append((address, x, y))
+
+    def run_until_idle(self, stop=None):
+        """
+        :param stop: called with the network after each run of a computer, running stops when it returns True
+        :return: True when the network became idle, False when it was stopped
+        """
+        start = time.perf_counter()
+        try:
+            if self.scheduling == ROUND_ROBIN:
+                return self._run_round_robin(stop)
+            return self._run_by_readiness(stop)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+    def statistics(self):
+        return {
+            "computers": len(self.computers),
+            "packets": self.packets,
+            "seconds": self.seconds,
+            "packets_per_second": self.packets / self.seconds if self.seconds else 0,
+        }
+
+    def _run_round_robin(self, stop):
+        while True:
+            idle = True
+            for address in range(len(self.computers)):
+                idle &= self._run_computer(address)
+                if stop is not None and stop(self):
+                    return False
+            if idle and not any(self.inboxes):
+                return True
+
+    def _run_by_readiness(self, stop):
+        while True:
+            while self._ready:
+                address = self._ready.popleft()
+                self._queued.discard(address)
+                self._run_computer(address)
+                if stop is not None and stop(self):
+                    return False
+
+            # no packets are pending, poll every computer
+            idle = True
+            for address in range(len(self.computers)):
+                idle &= self._run_computer(address)
+                if stop is not None and stop(self):
+                    return False
+            if idle and not self._ready:
+                return True
+
+    def _run_computer(self, address):
+        """
+        Runs a computer until it waits for input, halts or uses up its slice.
+
+        :return: whether it is idle: it polled its empty inbox without sending anything, or it halted
+        """
+        computer = self.computers[address]
+        if not computer.is_running():
+            return True
+
+        inbox = self.inboxes[address]
+        polled = not inbox
+        if polled:
+            inbox.append(self.empty_value)
+        computer.run(max_steps=self.slice_steps)
+        if computer.is_budget_exhausted() and address not in self._queued:
+            # continues in the next round
+            self._queued.add(address)
+            self._ready.append(address)
+
+        output = computer.take_output()
+        if output:
+            pending = self._pending_output[address]
+            pending += output
+            complete = len(pending) - len(pending) % 3
+            for i in range(0, complete, 3):
+                self.send(pending[i], pending[i + 1], pending[i + 2])
+            del pending[:complete]
+        return polled and not output and not computer.is_budget_exhausted()
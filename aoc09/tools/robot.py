@@ -34,9 +34,8 @@ class EmergencyHullPaintingRobot:
             print()
 
     def _run_computer(self, input):
-        self.computer.output_list.clear()
         self.computer.continue_run([input])
-        return self.computer.output_list
+        return self.computer.take_output()
 
     def _read_colour(self):
         return self.hull.colour(self.location)
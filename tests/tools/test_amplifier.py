@@ -0,0 +1,22 @@
+import unittest
+from aoc09.tools import amplifier
+from aoc09.tools.incode_computer import IntcodeComputer
+
+series_program = [3, 15, 3, 16, 1002, 16, 10, 16, 1, 16, 15, 15, 4, 15, 99, 0, 0]
+feedback_program = [3, 26, 1001, 26, -4, 26, 3, 27, 1002, 27, 2, 27, 1, 27, 26, 27, 4, 27, 1001, 28, -1, 28, 1005, 28,
+                    6, 99, 0, 0, 5]
+
+
+class TestAmplifier(unittest.TestCase):
+
+    def test_chain(self):
+        image = IntcodeComputer(series_program)
+        self.assertEqual(43210, amplifier.AmplifierChain(image, [4, 3, 2, 1, 0]).run())
+
+        image = IntcodeComputer(feedback_program)
+        self.assertEqual(139629729, amplifier.AmplifierChain(image, [9, 8, 7, 6, 5], feedback=True).run())
+
+    def test_find_max_signal(self):
+        self.assertEqual((43210, (4, 3, 2, 1, 0)), amplifier.find_max_signal(series_program, range(5)))
+        self.assertEqual((139629729, (9, 8, 7, 6, 5)),
+                         amplifier.find_max_signal(feedback_program, range(5, 10), feedback=True, workers=2))
@@ -0,0 +1,61 @@
+import unittest
+from aoc09.tools import incode_batch
+
+# outputs the sum of its two inputs
+program = [3, 12, 3, 13, 1, 12, 13, 12, 4, 12, 99, 0, 0, 0]
+
+
+def first_memory_value(computer):
+    return computer.memory.get(0)
+
+
+def patch_and_halt(computer, item):
+    computer.memory.set(0, 99)
+    computer.memory.set(1, item)
+
+
+def patch_operands(computer, item):
+    computer.memory.set(1, item[0])
+    computer.memory.set(2, item[1])
+
+
+def fork_and_run(image, item):
+    computer = image.fork()
+    computer.run(list(item))
+    return computer.output_list
+
+
+class TestIncodeBatch(unittest.TestCase):
+
+    def test_run_many(self):
+        items = [(x, y) for x in range(5) for y in range(5)]
+        self.assertEqual([x + y for x, y in items], incode_batch.run_many(program, items))
+        self.assertEqual([x + y for x, y in items], incode_batch.run_many(program, items, compile_blocks=True))
+
+    def test_run_many_with_workers(self):
+        items = [(x, 3) for x in range(20)]
+        self.assertEqual([x + 3 for x, _ in items], incode_batch.run_many(program, items, workers=2))
+
+    def test_runner_resets_memory(self):
+        runner = incode_batch.BatchRunner(program, prepare=patch_and_halt, result=first_memory_value)
+        self.assertEqual([99, 99], [runner.run(5), runner.run(7)])
+        self.assertEqual(7, runner.computer.memory.get(1))
+        self.assertEqual(program, runner.image.memory.dump())
+
+    def test_pool(self):
+        with incode_batch.IntcodePool(workers=2) as pool:
+            name = pool.publish(program)
+            items = [(x, 2 * x) for x in range(10)]
+            self.assertEqual([3 * x for x in range(10)], pool.map(name, items))
+            self.assertEqual([[3 * x] for x in range(10)], pool.apply(name, fork_and_run, items, chunk_size=3))
+            self.assertEqual([99, 99], pool.map(name, [5, 7], patch_and_halt, first_memory_value))
+
+            pool.release(name)
+            self.assertRaises(ValueError, pool.publish, [2 ** 70])
+
+    def test_patched_code_is_decoded_again(self):
+        # the first item leaves the program as it is, so its decoded add is kept with the image
+        adder = [1101, 0, 0, 20, 4, 20, 99]
+        items = [(0, 0), (3, 4), (10, 20)]
+        self.assertEqual([0, 7, 30], incode_batch.run_many(adder, items, prepare=patch_operands))
+        self.assertEqual([0, 7, 30], incode_batch.run_many(adder, items, prepare=patch_operands, compile_blocks=True))
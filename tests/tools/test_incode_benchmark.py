@@ -0,0 +1,25 @@
+import unittest
+from aoc09.tools import incode_benchmark
+
+
+def echo(new_computer, program):
+    for value in range(3):
+        new_computer(program).run([value])
+
+
+class TestIncodeBenchmark(unittest.TestCase):
+
+    def test_run_workload(self):
+        result = incode_benchmark.run_workload(echo, [3, 0, 4, 0, 99])
+        self.assertEqual("echo", result["workload"])
+        self.assertEqual(9, result["instructions"])
+        self.assertGreater(result["instructions_per_second"], 0)
+        self.assertGreater(result["peak_kib"], 0)
+
+    def test_regressions(self):
+        baseline = [{"workload": "day9", "instructions_per_second": 1000},
+                    {"workload": "day19", "instructions_per_second": 1000}]
+        results = [{"workload": "day9", "instructions_per_second": 950},
+                   {"workload": "day19", "instructions_per_second": 800},
+                   {"workload": "day21", "instructions_per_second": 10}]
+        self.assertEqual(["day19"], incode_benchmark.regressions(baseline, results))
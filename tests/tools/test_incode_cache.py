@@ -0,0 +1,35 @@
+import unittest
+from aoc09.tools.incode_cache import PrefixCache
+
+# outputs the sum of its two inputs
+program = [3, 12, 3, 13, 1, 12, 13, 12, 4, 12, 99, 0, 0, 0]
+
+
+class TestPrefixCache(unittest.TestCase):
+
+    def test_resumes_from_prefix(self):
+        cache = PrefixCache()
+        self.assertEqual([5], cache.run(program, [2, 3]).output_list)
+        self.assertEqual([6], cache.run(program, [2, 4]).output_list)
+        self.assertEqual([8], cache.run(program, [7, 1]).output_list)
+
+        waiting = cache.run(program, [7])
+        self.assertTrue(waiting.is_running())
+        waiting.continue_run([2])
+        self.assertEqual([9], waiting.output_list)
+
+        self.assertEqual({"hits": 3, "misses": 1, "evictions": 0, "entries": 3},
+                         {k: v for k, v in cache.statistics().items() if k != "bytes"})
+
+    def test_eviction(self):
+        cache = PrefixCache(max_bytes=2 * 256 * 36)
+        for x in range(4):
+            self.assertEqual([x + 1], cache.run(program, [x, 1]).output_list)
+        self.assertEqual(2, cache.statistics()["entries"])
+        self.assertEqual(3, cache.statistics()["evictions"])
+
+    def test_programs_with_equal_hashes(self):
+        # hash(-1) == hash(-2)
+        cache = PrefixCache()
+        self.assertEqual([-1], cache.run([104, -1, 3, 0, 99], []).output_list)
+        self.assertEqual([-2], cache.run([104, -2, 3, 0, 99], []).output_list)
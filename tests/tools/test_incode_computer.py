@@ -1,4 +1,9 @@
+import asyncio
+import gc
+import time
 import unittest
+import weakref
+from array import array
 from aoc09.tools import incode_computer
 
 
@@ -112,3 +117,213 @@ class TestIntcodeComputer(unittest.TestCase):
         comp = incode_computer.IntcodeComputer([104, 1125899906842624, 99])
         comp.run()
         self.assertEqual(1125899906842624, comp.output_list[0])
+
+    def test_self_modifying_code(self):
+        # the second pass runs an overwritten output parameter and halts where the first pass jumped
+        comp = incode_computer.IntcodeComputer([104, 1, 1101, 0, 7, 1, 1105, 1, 9, 1101, 0, 99, 6, 1105, 1, 0])
+        comp.run()
+        self.assertEqual([1, 7], comp.output_list)
+        self.assertFalse(comp.is_running())
+
+    def test_compiled_blocks(self):
+        # returns a copy of itself
+        mem = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99]
+        comp = incode_computer.IntcodeComputer(mem.copy(), compile_blocks=True)
+        comp.run()
+        self.assertEqual(mem, comp.output_list)
+
+        comp = incode_computer.IntcodeComputer([3, 3, 1108, -1, 8, 3, 4, 3, 99], compile_blocks=True)
+        comp.run([8])
+        self.assertEqual([1], comp.output_list)
+
+        # overwritten blocks fall back to the interpreter
+        comp = incode_computer.IntcodeComputer([104, 1, 1101, 0, 7, 1, 1105, 1, 9, 1101, 0, 99, 6, 1105, 1, 0],
+                                               compile_blocks=True)
+        comp.run()
+        self.assertEqual([1, 7], comp.output_list)
+        self.assertIn(1, comp.memory.code.modified)
+
+        # the add repairs the invalid mode of the output instruction before it runs
+        comp = incode_computer.IntcodeComputer([1101, 4, 0, 4, 304, 6, 99], compile_blocks=True)
+        comp.run()
+        self.assertEqual([99], comp.output_list)
+
+    def test_patched_code(self):
+        # outputs 5, or whatever is patched into the output instruction
+        for compile_blocks in (False, True):
+            comp = incode_computer.IntcodeComputer([3, 20, 104, 5, 1105, 1, 0], compile_blocks)
+            comp.run([1])
+            comp.memory.set(3, 42)
+            comp.continue_run([1])
+            self.assertEqual([5, 42], comp.output_list)
+
+    def test_peephole_blocks(self):
+        # a compare fused with the jump on its result, and an add of immediate operands folded to its value
+        mem = [3, 100, 1008, 100, 5, 101, 1005, 101, 12, 104, 0, 99, 4, 101, 1101, 2, 3, 102, 4, 102, 99]
+        for value, output in [(5, [1, 5]), (4, [0])]:
+            comp = incode_computer.IntcodeComputer(mem.copy(), compile_blocks=True)
+            comp.run([value])
+            self.assertEqual(output, comp.output_list)
+            self.assertEqual(int(value == 5), comp.memory.get(101))
+
+    def test_limited_runs(self):
+        # an endless loop stops in the budget exhausted state
+        for compile_blocks in [False, True]:
+            comp = incode_computer.IntcodeComputer([1105, 1, 0], compile_blocks)
+            comp.run(max_steps=10)
+            self.assertTrue(comp.is_budget_exhausted())
+            self.assertTrue(comp.is_running())
+        comp.run(deadline=time.monotonic() + 0.01)
+        self.assertTrue(comp.is_budget_exhausted())
+        token = incode_computer.CancellationToken()
+        token.cancel()
+        comp.run(cancel=token)
+        self.assertTrue(comp.is_budget_exhausted())
+
+        # resumed runs continue where the budget ran out
+        mem = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99]
+        comp = incode_computer.IntcodeComputer(mem.copy())
+        runs = 0
+        while comp.is_running():
+            comp.run(max_steps=7)
+            runs += 1
+        self.assertEqual(mem, comp.output_list)
+        self.assertGreater(runs, 10)
+
+    def test_fork(self):
+        # reads a value and adds it to the running total at address 12, forever
+        mem = [3, 13, 1, 12, 13, 12, 4, 12, 1105, 1, 0, 99, 0, 0]
+        comp = incode_computer.IntcodeComputer(mem)
+        comp.run([5])
+        snapshot = comp.snapshot()
+
+        fork = comp.fork()
+        fork.continue_run([10])
+        comp.continue_run([1])
+        self.assertEqual([5, 15], fork.output_list)
+        self.assertEqual([5, 6], comp.output_list)
+        self.assertEqual(mem[:12] + [15, 10], fork.memory.dump())
+
+        comp.restore(snapshot)
+        comp.continue_run([2])
+        self.assertEqual([5, 7], comp.output_list)
+        self.assertEqual(mem[:12] + [5, 5], snapshot.memory.dump())
+
+    def test_fork_shares_decoded_code(self):
+        # reads a value and increments the operand of the following output, forever
+        mem = [3, 20, 1001, 7, 1, 7, 104, 5, 1105, 1, 0]
+        for compile_blocks in (False, True):
+            comp = incode_computer.IntcodeComputer(mem.copy(), compile_blocks)
+            comp.run([1])
+            fork = comp.fork()
+            self.assertIs(comp.memory.code, fork.memory.code)
+
+            # the fork overwrites shared code while running
+            fork.continue_run([1, 1])
+            self.assertEqual([6, 7, 8], fork.output_list)
+            self.assertIsNot(comp.memory.code, fork.memory.code)
+            comp.continue_run([1])
+            self.assertEqual([6, 7], comp.output_list)
+
+    def test_sparse_memory(self):
+        # writes far past the program image and reads it back
+        comp = incode_computer.IntcodeComputer([1101, 7, 8, 1000000000000, 4, 1000000000000, 99])
+        comp.run()
+        self.assertEqual([15], comp.output_list)
+        self.assertEqual(2, comp.memory.resident_pages())
+        self.assertEqual(0, comp.memory.get(999999999999))
+        self.assertRaises(ValueError, comp.memory.dump)
+
+    def test_io_channels(self):
+        # doubles every input
+        mem = [3, 9, 102, 2, 9, 9, 4, 9, 1105, 1, 0]
+
+        comp = incode_computer.IntcodeComputer(mem)
+        comp.run(incode_computer.GeneratorInput(range(1, 4)))
+        self.assertEqual([2, 4, 6], comp.take_output())
+        comp.continue_run([5])
+        self.assertEqual([10], comp.take_output())
+        self.assertEqual([], comp.output_list)
+
+        outputs = []
+        pending = [7, 8]
+        comp = incode_computer.IntcodeComputer(mem)
+        comp.output_list = incode_computer.CallbackOutput(outputs.append)
+        comp.run(incode_computer.CallbackInput(lambda: pending.pop(0) if pending else None))
+        self.assertEqual([14, 16], outputs)
+        self.assertTrue(comp.is_running())
+
+    def test_ascii_channels(self):
+        # echoes its input until it reads a line break, then outputs 1000
+        mem = [3, 100, 4, 100, 1008, 100, 10, 101, 1006, 101, 0, 104, 1000, 1105, 1, 0]
+        comp = incode_computer.IntcodeComputer(mem)
+        comp.output_list = incode_computer.AsciiOutput()
+        comp.run(incode_computer.AsciiInput("ab\ncd"))
+        self.assertEqual(["ab"], list(comp.output_list.lines()))
+        self.assertIsNone(comp.output_list.readline())
+
+        comp.input_list.write(b"e\n")
+        comp.continue_run([])
+        self.assertEqual("cde", comp.output_list.readline())
+        self.assertEqual("ab\n1000cde\n1000", str(comp.output_list))
+        self.assertEqual([(3, 1000), (7, 1000)], comp.output_list.values)
+        self.assertEqual([98, 10, 1000, 99], comp.take_output()[1:5])
+        self.assertEqual("", str(comp.output_list))
+
+    def test_async_feedback_loop(self):
+        mem = [3, 26, 1001, 26, -4, 26, 3, 27, 1002, 27, 2, 27, 1, 27, 26, 27, 4, 27, 1001, 28, -1, 28, 1005, 28, 6, 99,
+               0, 0, 5]
+
+        async def amplify(phases):
+            queues = [asyncio.Queue() for _ in phases]
+            amps = [incode_computer.AsyncIntcodeComputer(mem, queues[i], queues[(i + 1) % len(phases)], slice_steps=5)
+                    for i in range(len(phases))]
+            for phase, queue in zip(phases, queues):
+                queue.put_nowait(phase)
+            queues[0].put_nowait(0)
+            await asyncio.gather(*(amp.run_async() for amp in amps))
+            return queues[0].get_nowait()
+
+        self.assertEqual(139629729, asyncio.run(amplify([9, 8, 7, 6, 5])))
+
+    def test_checkpoint(self):
+        # reads a value and adds it to the running total at address 12, forever
+        mem = [3, 13, 1, 12, 13, 12, 4, 12, 1105, 1, 0, 99, 0, 0]
+        comp = incode_computer.IntcodeComputer(mem)
+        comp.run([5, 10 ** 30])
+        comp.memory.set(10 ** 6, 7)
+        restored = incode_computer.IntcodeComputer.from_bytes(comp.to_bytes())
+
+        self.assertEqual(comp.output_list, restored.output_list)
+        self.assertEqual(7, restored.memory.get(10 ** 6))
+        self.assertEqual(comp.memory.resident_pages(), restored.memory.resident_pages())
+        restored.continue_run([1])
+        self.assertEqual([5, 10 ** 30 + 5, 10 ** 30 + 6], restored.output_list)
+
+    def test_compact_memory(self):
+        # returns a copy of itself
+        mem = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99]
+        comp = incode_computer.IntcodeComputer(mem.copy(), compact_memory=True)
+        comp.run()
+        self.assertEqual(mem, comp.output_list)
+        restored = incode_computer.IntcodeComputer.from_bytes(comp.to_bytes())
+        self.assertIsInstance(restored.memory.pages[0], array)
+        self.assertEqual(comp.memory.dump(), restored.memory.dump())
+
+        # stores a value beyond 64 bits
+        comp = incode_computer.IntcodeComputer([1102, 2 ** 32, 2 ** 32, 5, 99, 0], compact_memory=True)
+        fork = comp.fork()
+        comp.run()
+        self.assertEqual(2 ** 64, comp.memory.get(5))
+        self.assertIsInstance(comp.memory.pages[0], list)
+        self.assertEqual(0, fork.memory.get(5))
+        self.assertEqual(comp.memory.dump(), incode_computer.IntcodeComputer.from_bytes(comp.to_bytes()).memory.dump())
+
+        # freed without the cyclic garbage collector
+        gc.disable()
+        try:
+            memory = weakref.ref(fork.memory)
+            del fork
+            self.assertIsNone(memory())
+        finally:
+            gc.enable()
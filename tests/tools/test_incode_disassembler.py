@@ -0,0 +1,38 @@
+import unittest
+from aoc09.tools.incode_disassembler import ControlFlowGraph, disassemble
+
+
+class TestDisassembler(unittest.TestCase):
+
+    def test_listing(self):
+        listing = disassemble([3, 9, 8, 9, 10, 9, 4, 9, 99, -1, 8])
+        self.assertEqual("\n".join([
+            "Block 0-8 -> []",
+            "       0: IN   [9]",
+            "       2: EQ   [9] [10] [9]",
+            "       6: OUT  [9]",
+            "       8: HALT"]), listing)
+
+    def test_blocks(self):
+        # returns a copy of itself
+        graph = ControlFlowGraph([109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99])
+        self.assertEqual([0, 15], sorted(graph.blocks))
+        self.assertEqual([0, 15], graph.blocks[0].successors)
+        self.assertEqual({0}, graph.jump_targets)
+        self.assertEqual(set(), graph.self_modified)
+
+    def test_indirect_jumps_and_self_modification(self):
+        # calls a subroutine through a return address on the stack, then overwrites its first instruction
+        program = [109, 100, 21101, 0, 13, 0, 1105, 1, 17, 1, 0, 0, 0, 1101, 0, 99, 17, 2106, 0, 0]
+        graph = ControlFlowGraph(program)
+        self.assertEqual([0, 13, 17], sorted(graph.blocks))
+        self.assertTrue(graph.blocks[17].indirect)
+        self.assertEqual({17}, graph.self_modified)
+
+    def test_peephole_patterns(self):
+        graph = ControlFlowGraph([3, 100, 1008, 100, 5, 101, 1005, 101, 12, 104, 0, 99, 1101, 100, -1, 4, 1107, 2, 3, 0])
+        self.assertTrue(graph.instructions[2].fuses_with(graph.instructions[6]))
+        self.assertFalse(graph.instructions[6].fuses_with(graph.instructions[9]))
+        self.assertIsNone(graph.instructions[2].constant_value())
+        self.assertEqual(99, graph.instructions[12].constant_value())
+        self.assertEqual(1, graph.instructions[16].constant_value())
@@ -0,0 +1,37 @@
+import unittest
+from aoc09.tools.incode_explorer import Explorer, BFS, DFS, BEST_FIRST
+
+# a droid (D) in a maze with the goal (G) in the north east:
+#   #####
+#   #.#G#
+#   #D..#
+#   #####
+maze = [3, 59, 9, 59, 201, 67, 65, 63, 201, 72, 66, 64, 1002, 59, -1, 60, 9, 60, 1002, 64, 5, 61, 1, 61, 63, 61, 1001,
+        61, 77, 61, 9, 61, 1201, 0, 0, 62, 1002, 61, -1, 61, 9, 61, 4, 62, 1006, 62, 0, 1001, 63, 0, 65, 1001, 64, 0,
+        66, 1105, 1, 0, 99, 0, 0, 0, 0, 0, 0, 1, 1, 0, 0, 0, -1, 1, 0, 1, -1, 0, 0, 0, 0, 0, 0, 0, 0, 1, 1, 1, 0, 0,
+        1, 0, 2, 0, 0, 0, 0, 0, 0]
+
+
+class TestIncodeExplorer(unittest.TestCase):
+
+    def test_modes(self):
+        explorer = Explorer(maze, mode=BFS)
+        position, distance, droid = explorer.explore()
+        self.assertEqual(((2, 1), 3), (position, distance))
+        droid.continue_run([4])
+        self.assertEqual([0], droid.output_list[-1:])
+
+        explorer = Explorer(maze, mode=DFS)
+        self.assertEqual((2, 1), explorer.explore()[0])
+
+        explorer = Explorer(maze, mode=BEST_FIRST, heuristic=lambda p, d: d + abs(p[0] - 2) + abs(p[1] - 1))
+        self.assertEqual(((2, 1), 3), explorer.explore()[:2])
+        self.assertRaises(ValueError, Explorer(maze, mode=BEST_FIRST).explore)
+
+    def test_whole_area(self):
+        for workers in [1, 2]:
+            explorer = Explorer(maze, workers=workers)
+            self.assertEqual(((2, 1), 3), explorer.explore(stop_at_goal=False)[:2])
+            self.assertEqual({(0, 0): 0, (1, 0): 1, (2, 0): 2, (0, 1): 1, (2, 1): 3}, explorer.distances)
+            self.assertEqual(5, explorer.statistics()["expanded"])
+            self.assertEqual(0, explorer.replies[(1, 1)])
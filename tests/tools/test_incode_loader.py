@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+from aoc09.tools.incode_loader import load_program, CACHE_FOLDER
+
+
+class TestIncodeLoader(unittest.TestCase):
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as folder:
+            source = os.path.join(folder, "day9")
+            with open(source, "w") as out:
+                out.write("109,1,204,-1,\n1001,100,1,100\n")
+
+            expected = [109, 1, 204, -1, 1001, 100, 1, 100]
+            self.assertEqual(expected, load_program("day9", folder))
+            self.assertTrue(os.path.exists(os.path.join(folder, CACHE_FOLDER, "day9.icp")))
+            self.assertEqual(expected, load_program("day9", folder))
+
+            # a touched source is recognised by its content, a changed one is parsed again
+            os.utime(source, ns=(1, 1))
+            self.assertEqual(expected, load_program("day9", folder))
+            with open(source, "w") as out:
+                out.write("3,0,4,0,99")
+            os.utime(source, ns=(2, 2))
+            self.assertEqual([3, 0, 4, 0, 99], load_program("day9", folder))
+
+    def test_large_values_are_not_cached(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "big"), "w") as out:
+                out.write(f"104,{2 ** 70},99")
+            self.assertEqual([104, 2 ** 70, 99], load_program("big", folder))
+            self.assertFalse(os.path.exists(os.path.join(folder, CACHE_FOLDER, "big.icp")))
+
+    def test_truncated_cache(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "day5"), "w") as out:
+                out.write("3,0,4,0,99")
+            self.assertEqual([3, 0, 4, 0, 99], load_program("day5", folder))
+
+            cache = os.path.join(folder, CACHE_FOLDER, "day5.icp")
+            with open(cache, "r+b") as binary:
+                binary.truncate(os.path.getsize(cache) - 8)
+            self.assertEqual([3, 0, 4, 0, 99], load_program("day5", folder))
+            self.assertEqual([3, 0, 4, 0, 99], load_program("day5", folder))
+
+    def test_unwritable_cache(self):
+        with tempfile.TemporaryDirectory() as folder:
+            with open(os.path.join(folder, "day5"), "w") as out:
+                out.write("3,0,4,0,99")
+            # a folder where the cache should be, which it cannot be moved onto
+            os.makedirs(os.path.join(folder, CACHE_FOLDER, "day5.icp"))
+            self.assertEqual([3, 0, 4, 0, 99], load_program("day5", folder))
+            self.assertEqual(["day5.icp"], os.listdir(os.path.join(folder, CACHE_FOLDER)))
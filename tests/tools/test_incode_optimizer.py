@@ -0,0 +1,29 @@
+import unittest
+from collections import Counter
+from aoc09.tools.incode_optimizer import peephole_counts
+
+
+class TestIncodeOptimizer(unittest.TestCase):
+
+    def test_peephole_counts(self):
+        mem = [3, 100, 1008, 100, 5, 101, 1005, 101, 12, 104, 0, 99, 4, 101, 1101, 2, 3, 102, 4, 102, 99]
+        counts = peephole_counts(mem, Counter({0: 1, 2: 1, 6: 1, 12: 1, 14: 1, 18: 1, 20: 1}))
+        self.assertEqual(9, counts["instructions"])
+        self.assertEqual(1, counts["folded"])
+        self.assertEqual(1, counts["fused"])
+        self.assertEqual(7, counts["executed"])
+        self.assertEqual(1, counts["executed_fused"])
+        self.assertEqual(0, counts["undecoded"])
+
+    def test_undecoded_code(self):
+        # jumps to the output through an address kept in memory, which the static view does not follow
+        mem = [105, 1, 3, 6, 99, 0, 104, 7, 99]
+        counts = peephole_counts(mem, Counter({0: 1, 6: 1, 8: 1}))
+        self.assertEqual(1, counts["instructions"])
+        self.assertEqual(2, counts["undecoded"])
+
+    def test_self_modified_code_is_not_optimized(self):
+        # the first add overwrites an operand of the second one, so only the first is folded
+        counts = peephole_counts([1101, 1, 1, 5, 1101, 0, 0, 9, 99])
+        self.assertEqual(3, counts["instructions"])
+        self.assertEqual(1, counts["folded"])
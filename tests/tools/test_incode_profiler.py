@@ -0,0 +1,39 @@
+import json
+import os
+import tempfile
+import unittest
+from aoc09.tools.incode_computer import IntcodeComputer
+from aoc09.tools.incode_profiler import IntcodeProfiler
+
+
+class TestIntcodeProfiler(unittest.TestCase):
+
+    def test_counts(self):
+        # returns a copy of itself
+        mem = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99]
+        comp = IntcodeComputer(mem)
+        comp.profiler = IntcodeProfiler()
+        comp.run()
+
+        self.assertEqual(mem, comp.output_list)
+        self.assertEqual(16, comp.profiler.executions[2])
+        self.assertEqual(1, comp.profiler.executions[15])
+        self.assertEqual(16 * 5 + 1, comp.profiler.total())
+        self.assertEqual(16, comp.profiler.codes[1001])
+        self.assertEqual(16, comp.profiler.writes[100])
+        self.assertEqual(32, comp.profiler.reads[100])
+        self.assertIn("81 instructions executed", comp.profiler.report())
+
+    def test_json_at_halt(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "profile.json")
+            comp = IntcodeComputer([3, 0, 4, 0, 99])
+            comp.profiler = IntcodeProfiler(json_path=path)
+            comp.run()
+            self.assertFalse(os.path.exists(path))
+
+            comp.continue_run([7])
+            with open(path) as file:
+                profile = json.load(file)
+            self.assertEqual(3, profile["instructions"])  # the read that waited for input counts once
+            self.assertEqual({"0": 1}, profile["writes"])
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+from aoc09.tools.incode_computer import IntcodeComputer
+from aoc09.tools.incode_profiler import IntcodeProfiler
+from aoc09.tools.incode_replay import InputRecorder, replay
+from aoc09.tools.incode_trace import IntcodeTracer
+
+# outputs the sum of the values it reads until it reads 0
+program = [3, 100, 1, 100, 101, 101, 4, 101, 1005, 100, 0, 99]
+
+
+class TestIncodeReplay(unittest.TestCase):
+
+    def test_record_and_replay(self):
+        comp = IntcodeComputer(program)
+        comp.recorder = InputRecorder()
+        for value in [3, 4, 0]:
+            comp.run([value])
+        self.assertEqual([3, 7, 7], comp.output_list)
+        self.assertEqual([(0, 3), (4, 4), (8, 0)], comp.recorder.entries())
+        self.assertEqual(13, comp.recorder.instructions)
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "session.replay")
+            comp.recorder.save(path)
+            recorder = InputRecorder.load(path)
+
+        self.assertEqual([3, 4, 0], recorder.inputs())
+        replayed = replay(program, recorder, verify=True)
+        self.assertEqual([3, 7, 7], replayed.output_list)
+        self.assertFalse(replayed.is_running())
+
+        # a different program reads the input at other points
+        self.assertRaises(ValueError, replay, [3, 100, 1101, 0, 0, 100] + program[2:], recorder, True)
+
+    def test_record_while_tracing(self):
+        comp = IntcodeComputer(program)
+        comp.recorder = InputRecorder()
+        comp.tracer = IntcodeTracer(capacity=2)
+        for value in [3, 4, 0]:
+            comp.run([value])
+        self.assertEqual([(0, 3), (4, 4), (8, 0)], comp.recorder.entries())
+        self.assertEqual(13, comp.recorder.instructions)
+        self.assertEqual(13, comp.tracer.count)
+
+        # the profiler runs its own loop, which would leave out the recording
+        comp.profiler = IntcodeProfiler()
+        self.assertRaises(ValueError, comp.run, [1])
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from aoc09.tools.incode_computer import IntcodeComputer
+from aoc09.tools.incode_trace import IntcodeTracer, read_trace
+
+
+class TestIncodeTrace(unittest.TestCase):
+
+    def test_ring_buffer(self):
+        # returns a copy of itself
+        mem = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99]
+        comp = IntcodeComputer(mem.copy())
+        comp.tracer = IntcodeTracer(capacity=4)
+        comp.run()
+        self.assertEqual(mem, comp.output_list)
+        self.assertEqual(81, comp.tracer.count)
+
+        last = comp.tracer.last()
+        self.assertEqual([4, 8, 12, 15], [r.pointer for r in last])
+        self.assertEqual(16, last[0].result)
+        self.assertEqual((100, 16, 101), last[1].words)
+        self.assertEqual(15, last[2].result)  # the jump falls through to the halt
+        self.assertEqual("    15: HALT", repr(last[3].instruction()))
+        self.assertEqual([12, 15], [r.pointer for r in comp.tracer.last(2)])
+
+    def test_export(self):
+        comp = IntcodeComputer([3, 9, 8, 9, 10, 9, 4, 9, 99, -1, 8])
+        comp.tracer = IntcodeTracer(capacity=100)
+        comp.run()
+        # the read waiting for input is not recorded
+        self.assertEqual(0, comp.tracer.count)
+        comp.run([8])
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "trace.bin")
+            comp.tracer.save(path)
+            self.assertEqual([0, 2, 6, 8], [r.pointer for r in read_trace(path)])
+            self.assertEqual([8, 1, 1, 0], [r.result for r in read_trace(path)])
+            self.assertEqual([6, 8], [r.pointer for r in read_trace(path, 2)])
+
+    def test_wait_after_wrapping(self):
+        comp = IntcodeComputer([1101, 0, 0, 20, 1101, 0, 0, 21, 3, 22, 99])
+        comp.tracer = IntcodeTracer(capacity=2)
+        comp.run()
+        self.assertEqual(2, comp.tracer.count)
+        self.assertEqual([0, 4], [r.pointer for r in comp.tracer.last()])
+
+        comp.run([5])
+        self.assertEqual([8, 10], [r.pointer for r in comp.tracer.last()])
+
+    def test_limited_and_switched_runs(self):
+        comp = IntcodeComputer([1105, 1, 0])
+        comp.tracer = IntcodeTracer(capacity=3)
+        comp.run(max_steps=5)
+        self.assertTrue(comp.is_budget_exhausted())
+        self.assertEqual(5, comp.tracer.count)
+
+        # large values are clipped and tracing can be switched off between runs
+        comp = IntcodeComputer([1102, 2 ** 40, 2 ** 40, 7, 4, 7, 99, 0])
+        comp.tracer = IntcodeTracer()
+        comp.run()
+        self.assertEqual(2 ** 63 - 1, comp.tracer.last(3)[0].result)
+        comp.tracer = None
+        comp.pointer = 0
+        comp.run()
+        self.assertEqual([2 ** 80, 2 ** 80], comp.output_list)
@@ -0,0 +1,33 @@
+import unittest
+from aoc09.tools.incode_computer import IntcodeComputer
+from aoc09.tools.incode_vector import LockstepIntcode, DONE, WAITING_FOR_INPUT
+
+
+class TestLockstepIntcode(unittest.TestCase):
+
+    def test_matches_intcode_computer(self):
+        # 1 if the input equals 8, otherwise 0, using jumps in position mode
+        program = [3, 12, 6, 12, 15, 1, 13, 14, 13, 4, 13, 99, -1, 0, 1, 9, 3, 9, 8, 9, 10, 9, 4, 9, 99, -1, 8]
+        inputs = [[i] for i in range(-3, 12)]
+        expected = []
+        for values in inputs:
+            computer = IntcodeComputer(program)
+            computer.run(values.copy())
+            expected.append(computer.output_list)
+
+        self.assertEqual(expected, LockstepIntcode(program, len(inputs)).run(inputs))
+
+    def test_relative_mode_and_memory_growth(self):
+        # returns a copy of itself
+        mem = [109, 1, 204, -1, 1001, 100, 1, 100, 1008, 100, 16, 101, 1006, 101, 0, 99]
+        self.assertEqual([mem, mem], LockstepIntcode(mem, 2).run([[], []]))
+
+    def test_patched_memory_and_waiting(self):
+        # adds its two parameters, then reads an input over the sum
+        program = [1101, 0, 0, 0, 3, 0, 99]
+        lockstep = LockstepIntcode(program, 3)
+        lockstep.memory[:, 1] = [0, 1, 2]
+        lockstep.memory[:, 2] = [0, 0, 4]
+        lockstep.run([[], [], [5]])
+        self.assertEqual([0, 1, 5], list(lockstep.memory[:, 0]))
+        self.assertEqual([WAITING_FOR_INPUT, WAITING_FOR_INPUT, DONE], list(lockstep.state))
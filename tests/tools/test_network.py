@@ -0,0 +1,29 @@
+import unittest
+from aoc09.tools.network import Network, READINESS, ROUND_ROBIN
+
+# forwards every packet (x, y) it receives to address x as (x + 1, y + its own address)
+program = [3, 31, 3, 32, 1008, 32, -1, 34, 1005, 34, 2, 3, 33, 4, 32, 101, 1, 32, 32, 4, 32, 1, 33, 31, 33, 4, 33,
+           1105, 1, 2, 99, 0, 0, 0, 0]
+
+
+class TestNetwork(unittest.TestCase):
+
+    def test_packet_chain(self):
+        for scheduling in [ROUND_ROBIN, READINESS]:
+            for slice_steps in [None, 5]:
+                network = Network(program, 50, scheduling, slice_steps=slice_steps)
+                self.assertTrue(network.run_until_idle())
+                network.send(0, 1, 0)
+                self.assertTrue(network.run_until_idle())
+
+                self.assertEqual([(50, 51, 1225)], list(network.outbox))
+                self.assertEqual(51, network.statistics()["packets"])
+                self.assertFalse(any(network.inboxes))
+
+    def test_stop(self):
+        network = Network(program, 10, READINESS)
+        network.send(0, 1, 0)
+        self.assertFalse(network.run_until_idle(stop=lambda n: n.packets == 5))
+        self.assertEqual(5, network.packets)
+        self.assertTrue(network.run_until_idle())
+        self.assertEqual([(10, 11, 45)], list(network.outbox))